@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import asyncpg
+from cachetools import TTLCache
+from fastapi.encoders import jsonable_encoder
+from backend.database.db_connection_asyncpg import get_db_connection
+from backend.database.notifications import COHORT_CHANGED, STUDENT_CHANGES_CHANNEL
+
+API_CACHE_TTL = int(os.getenv("API_CACHE_TTL", "300"))
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "1024"))
+RECONNECT_DELAY = 5
+# One entity-tag from an If-None-Match list, weak (W/"...") or strong ("...")
+ENTITY_TAG = re.compile(r'(W/)?"[^"]*"')
+# Per-student endpoints that embed cohort-wide figures such as cohort_percentile
+COHORT_DEPENDENT_ENDPOINTS = {"top_subjects"}
+
+class ResponseCache:
+    """TTL/LRU cache of serialized read-endpoint responses.
+
+    Keys are (endpoint, register_no, params). register_no is None for list endpoints, which are
+    dropped whenever any student changes; per-student entries are dropped only for that student."""
+
+    def __init__(self, ttl=API_CACHE_TTL, maxsize=API_CACHE_MAX_ENTRIES):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped by every invalidation, so a compute that overlapped one is not cached
+        self._generation = 0
+
+    @staticmethod
+    def _key(endpoint, register_no, params):
+        return endpoint, register_no, tuple(sorted((params or {}).items()))
+
+    async def get_or_compute(self, endpoint, compute, register_no=None, params=None):
+        """Returns (body, etag, headers). `compute` is an async callable returning (payload, headers)."""
+        key = self._key(endpoint, register_no, params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        generation = self._generation
+        payload, headers = await compute()
+        body = json.dumps(jsonable_encoder(payload)).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        entry = (body, etag, headers or {})
+        # The data may have changed after compute read it; serve it this once but do not keep it
+        if generation == self._generation:
+            self._entries[key] = entry
+        return entry
+
+    def invalidate(self, register_no):
+        """Drop one student's entries plus every list entry; "*" clears everything, and COHORT_CHANGED
+        drops list entries plus every student's entries from COHORT_DEPENDENT_ENDPOINTS."""
+        self.invalidations += 1
+        self._generation += 1
+        if register_no == "*":
+            self._entries.clear()
+            return
+        cohort = register_no == COHORT_CHANGED
+        for key in list(self._entries.keys()):
+            if key[1] is None or key[1] == register_no or (cohort and key[0] in COHORT_DEPENDENT_ENDPOINTS):
+                self._entries.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check per RFC 9110: "*" or a comma-separated list of tags, compared weakly (W/ ignored)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(match.group(0).removeprefix("W/") == etag for match in ENTITY_TAG.finditer(if_none_match))
+
+response_cache = ResponseCache()
+
+async def listen_for_invalidations(*on_change):
+    """Keep a dedicated LISTEN connection open, reconnecting (and clearing the cache) if it drops.
+
+    Besides the response cache, every callable in on_change is called with each notification payload."""
+    callbacks = [response_cache.invalidate, *on_change]
+
+    def dispatch(payload):
+        for callback in callbacks:
+            callback(payload)
+
+    while True:
+        try:
+            conn = await get_db_connection()
+        except (OSError, asyncpg.PostgresError) as e:
+            logging.warning(f"Cache invalidation listener could not connect: {e}")
+            await asyncio.sleep(RECONNECT_DELAY)
+            continue
+
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _conn: lost.set())
+        await conn.add_listener(STUDENT_CHANGES_CHANNEL, lambda _conn, _pid, _channel, payload: dispatch(payload))
+        # Anything committed while we were not listening could be stale
+        dispatch("*")
+        try:
+            await lost.wait()
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(RECONNECT_DELAY)
@@ -0,0 +1,180 @@
+import io
+import os
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+from backend.api.queries import student_filter_clauses
+
+# Rows pulled from the server-side cursor and written out as one record batch (and Parquet row group)
+EXPORT_BATCH_ROWS = int(os.getenv("API_EXPORT_BATCH_ROWS", "10000"))
+
+STUDENT_FIELDS = [
+    ("register_no", pa.string()),
+    ("name", pa.string()),
+    ("cgpa", pa.float32()),
+    ("course", pa.string()),
+    ("school", pa.string()),
+    ("course_duration", pa.string()),
+]
+SEMESTER_FIELDS = [
+    ("exam_schedule_timetable_id", pa.int32()),
+    ("semester_no", pa.int32()),
+    ("register_no", pa.string()),
+    ("passing_year", pa.int32()),
+    ("passing_month", pa.string()),
+    ("sgpa", pa.decimal128(4, 2)),
+    ("total_credits", pa.float32()),
+    ("earned_credits", pa.float32()),
+    ("obtained_marks", pa.float32()),
+    ("out_of_marks", pa.float32()),
+    ("result_status", pa.string()),
+    ("block_status", pa.bool_()),
+    ("block_reason", pa.string()),
+    ("ordinance", pa.string()),
+]
+SUBJECT_FIELDS = [
+    ("exam_schedule_timetable_id", pa.int32()),
+    ("subject_code", pa.string()),
+    ("semester_no", pa.int32()),
+    ("register_no", pa.string()),
+    ("subject_name", pa.string()),
+    ("internal_marks", pa.float32()),
+    ("internal_passing_marks", pa.float32()),
+    ("max_internal_marks", pa.float32()),
+    ("external_marks", pa.float32()),
+    ("external_passing_marks", pa.float32()),
+    ("max_external_marks", pa.float32()),
+    ("grade", pa.string()),
+    ("grade_point", pa.float32()),
+    ("credits_obtained", pa.decimal128(3, 2)),
+    ("max_credits", pa.decimal128(3, 2)),
+]
+# One row per subject sitting with its semester and student alongside: the flat form of /students
+RESULT_FIELDS = [
+    ("register_no", pa.string()),
+    ("name", pa.string()),
+    ("course", pa.string()),
+    ("school", pa.string()),
+    ("cgpa", pa.float32()),
+    ("exam_schedule_timetable_id", pa.int32()),
+    ("semester_no", pa.int32()),
+    ("passing_year", pa.int32()),
+    ("passing_month", pa.string()),
+    ("sgpa", pa.decimal128(4, 2)),
+    ("result_status", pa.string()),
+    ("subject_code", pa.string()),
+    ("subject_name", pa.string()),
+    ("internal_marks", pa.float32()),
+    ("external_marks", pa.float32()),
+    ("max_internal_marks", pa.float32()),
+    ("max_external_marks", pa.float32()),
+    ("grade", pa.string()),
+    ("grade_point", pa.float32()),
+    ("credits_obtained", pa.decimal128(3, 2)),
+    ("max_credits", pa.decimal128(3, 2)),
+]
+
+def _columns(alias, fields):
+    return ", ".join(f"{alias}.{name}" for name, _ in fields)
+
+# table -> (schema, SELECT ... FROM with the student row aliased as s, ORDER BY)
+EXPORTS = {
+    "students": (
+        pa.schema(STUDENT_FIELDS),
+        f"SELECT {_columns('s', STUDENT_FIELDS)} FROM students s",
+        "s.register_no",
+    ),
+    "semesters": (
+        pa.schema(SEMESTER_FIELDS),
+        f"SELECT {_columns('sem', SEMESTER_FIELDS)} FROM semesters sem JOIN students s ON s.register_no = sem.register_no",
+        "sem.register_no, sem.exam_schedule_timetable_id, sem.semester_no",
+    ),
+    "subjects": (
+        pa.schema(SUBJECT_FIELDS),
+        f"SELECT {_columns('sub', SUBJECT_FIELDS)} FROM subjects sub JOIN students s ON s.register_no = sub.register_no",
+        "sub.register_no, sub.semester_no, sub.exam_schedule_timetable_id, sub.subject_code",
+    ),
+    "results": (
+        pa.schema(RESULT_FIELDS),
+        """SELECT s.register_no, s.name, s.course, s.school, s.cgpa,
+                  sem.exam_schedule_timetable_id, sem.semester_no, sem.passing_year, sem.passing_month,
+                  sem.sgpa, sem.result_status,
+                  sub.subject_code, sub.subject_name, sub.internal_marks, sub.external_marks,
+                  sub.max_internal_marks, sub.max_external_marks, sub.grade, sub.grade_point,
+                  sub.credits_obtained, sub.max_credits
+           FROM students s
+           JOIN semesters sem ON sem.register_no = s.register_no
+           JOIN subjects sub ON sub.register_no = sem.register_no
+                            AND sub.semester_no = sem.semester_no
+                            AND sub.exam_schedule_timetable_id = sem.exam_schedule_timetable_id""",
+        "s.register_no, sem.exam_schedule_timetable_id, sem.semester_no, sub.subject_code",
+    ),
+}
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "csv": ("text/csv", "csv"),
+}
+
+def build_export_query(table, filters):
+    """Returns (schema, query, args) for an export, with the /students filters pushed into the WHERE."""
+    schema, select, order = EXPORTS[table]
+    args = []
+    clauses = student_filter_clauses(filters, args)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return schema, f"{select} {where} ORDER BY {order}", args
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever has been written since the last drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def open_writer(fmt, sink, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    if fmt == "arrow":
+        return pa_ipc.new_stream(sink, schema)
+    return pa_csv.CSVWriter(sink, schema)
+
+def to_record_batch(rows, schema):
+    columns = {name: [row[i] for row in rows] for i, name in enumerate(schema.names)}
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+async def stream_export(conn, table, fmt, filters, batch_rows=EXPORT_BATCH_ROWS):
+    """Yield the encoded export chunk by chunk; at most one batch of rows is held in memory at a time."""
+    schema, query, args = build_export_query(table, filters)
+    sink = ChunkSink()
+    writer = open_writer(fmt, sink, schema)
+    async with conn.transaction():
+        cursor = await conn.cursor(query, *args)
+        while True:
+            rows = await cursor.fetch(batch_rows)
+            if not rows:
+                break
+            writer.write_batch(to_record_batch(rows, schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    # Parquet writes its footer and the Arrow stream its end marker on close
+    writer.close()
+    yield sink.drain()
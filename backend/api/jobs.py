@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from backend.lib.progress import parse_progress
+from backend.lib.telemetry import current_job_id, observe_span
+
+# Scrapes allowed to run at once; each is a separate fetcher process
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "2"))
+# Finished jobs kept around for status lookups
+MAX_FINISHED_JOBS = 200
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+class ScrapeJob:
+    """One queued or running scrape, with its full event history for late subscribers."""
+
+    def __init__(self, username, incremental):
+        self.id = uuid.uuid4().hex
+        self.username = username
+        self.incremental = incremental
+        self.status = "queued"
+        self.returncode = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed")
+
+    async def emit(self, event, **fields):
+        self.events.append({"event": event, "ts": time.time(), **fields})
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def stream(self):
+        """Yield past events, then live ones, until the job finishes."""
+        sent = 0
+        while True:
+            while sent < len(self.events):
+                yield self.events[sent]
+                sent += 1
+            if self.done:
+                return
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.events) > sent or self.done)
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "username": self.username,
+            "status": self.status,
+            "returncode": self.returncode,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "progress": next((e for e in reversed(self.events) if e["event"] not in ("log", "span", "span_totals")), None),
+            "timings": self.timings(),
+        }
+
+    def timings(self):
+        """Total seconds and count per span name, so a slow scrape shows where the time went."""
+        totals = {}
+        for e in self.events:
+            if e["event"] in ("span", "span_totals"):
+                entry = totals.setdefault(e["span"], {"count": 0, "seconds": 0.0})
+                entry["count"] += e.get("count", 1)
+                entry["seconds"] = round(entry["seconds"] + e["seconds"], 4)
+        return totals
+
+class JobManager:
+    """Queues scrape requests and runs them as fetcher subprocesses on a bounded set of workers.
+
+    Requests for an account that already has a queued or running job are coalesced onto it."""
+
+    def __init__(self, workers=SCRAPE_WORKERS):
+        self.workers = workers
+        self.jobs = {}
+        self.active_by_username = {}
+        self._queue = asyncio.Queue()
+        self._tasks = []
+        self._processes = set()
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for process in list(self._processes):
+            process.kill()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def submit(self, username, password, incremental=False):
+        """Returns (job, coalesced)."""
+        active = self.active_by_username.get(username)
+        if active is not None:
+            return active, True
+        job = ScrapeJob(username, incremental)
+        self.jobs[job.id] = job
+        self.active_by_username[username] = job
+        self._queue.put_nowait((job, password))
+        self._prune()
+        return job, False
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def counts(self):
+        counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.done]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:-MAX_FINISHED_JOBS or None]:
+            del self.jobs[job.id]
+
+    async def _worker(self):
+        while True:
+            job, password = await self._queue.get()
+            try:
+                await self._run(job, password)
+            except Exception as e:
+                logging.exception("Scrape job %s crashed", job.id)
+                await job.emit("log", line=f"Job runner error: {e}")
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                self.active_by_username.pop(job.username, None)
+                await job.emit("finished", status=job.status, returncode=job.returncode)
+
+    async def _run(self, job, password):
+        job.status = "running"
+        current_job_id.set(job.id)
+        await job.emit("started")
+        env = os.environ.copy()
+        # Credentials go through the environment, never the command line
+        env.update(CMR_USERNAME=job.username, CMR_PASSWORD=password, PYTHONIOENCODING="utf-8", SCRAPER_PROGRESS="1",
+                   SCRAPE_JOB_ID=job.id)
+        args = [sys.executable, "-m", "backend.scraper.fetcher"] + (["--incremental"] if job.incremental else [])
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            cwd=str(PROJECT_ROOT),
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        self._processes.add(process)
+        try:
+            async for raw in process.stdout:
+                line = raw.decode("utf-8", errors="replace").rstrip()
+                progress = parse_progress(line)
+                if progress is not None:
+                    if progress["event"] == "span":
+                        # The fetcher's own registry dies with it; record its spans in the API's
+                        observe_span(progress["span"], progress["seconds"], progress)
+                    await job.emit(progress.pop("event"), **progress)
+                elif line:
+                    await job.emit("log", line=line)
+            job.returncode = await process.wait()
+        finally:
+            self._processes.discard(process)
+        job.status = "succeeded" if job.returncode == 0 else "failed"
+
+job_manager = JobManager()
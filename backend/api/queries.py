@@ -0,0 +1,227 @@
+import base64
+import json
+import re
+
+# Sortable columns for /students; NULLs are folded into a sentinel so keyset comparisons stay total
+SORT_EXPRESSIONS = {
+    "register_no": "{t}.register_no",
+    "name": "COALESCE({t}.name, '')",
+    "cgpa": "COALESCE({t}.cgpa, -1)",
+}
+
+STUDENT_COLUMNS = "{t}.register_no, {t}.name, {t}.cgpa, {t}.course, {t}.school, {t}.course_duration"
+
+SEMESTERS_JSON = """
+    jsonb_agg(
+        jsonb_build_object(
+            'exam_schedule_timetable_id', sem.exam_schedule_timetable_id,
+            'semester_no', sem.semester_no,
+            'result_status', sem.result_status,
+            'block_status', sem.block_status,
+            'block_reason', sem.block_reason,
+            'ordinance', sem.ordinance,
+            'passing_year', sem.passing_year,
+            'passing_month', sem.passing_month,
+            'sgpa', sem.sgpa,
+            'total_credits', sem.total_credits,
+            'earned_credits', sem.earned_credits,
+            'obtained_marks', sem.obtained_marks,
+            'out_of_marks', sem.out_of_marks,
+            'subjects', (
+                SELECT jsonb_agg(
+                    jsonb_build_object(
+                        'subject_code', sub.subject_code,
+                        'subject_name', sub.subject_name,
+                        'internal_marks', sub.internal_marks,
+                        'internal_passing_marks', sub.internal_passing_marks,
+                        'max_internal_marks', sub.max_internal_marks,
+                        'external_marks', sub.external_marks,
+                        'external_passing_marks', sub.external_passing_marks,
+                        'max_external_marks', sub.max_external_marks,
+                        'grade', sub.grade,
+                        'grade_point', sub.grade_point,
+                        'credits_obtained', sub.credits_obtained,
+                        'max_credits', sub.max_credits
+                    )
+                )
+                FROM subjects sub
+                WHERE
+                    sub.register_no = {t}.register_no
+                    AND sub.semester_no = sem.semester_no
+                    AND sub.exam_schedule_timetable_id = sem.exam_schedule_timetable_id
+            )
+        )
+    ) FILTER (WHERE sem.register_no IS NOT NULL) AS semesters
+"""
+
+SGPA_PROGRESSION_QUERY = """
+    SELECT semester_no, passing_year, passing_month, sgpa
+    FROM semesters
+    WHERE register_no = $1
+    ORDER BY passing_year, passing_month, semester_no;
+"""
+
+def encode_cursor(sort_value, register_no):
+    return base64.urlsafe_b64encode(json.dumps([sort_value, register_no]).encode()).decode()
+
+def decode_cursor(cursor):
+    """Returns (sort_value, register_no); raises ValueError on a malformed cursor."""
+    try:
+        sort_value, register_no = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    return sort_value, register_no
+
+def student_filter_clauses(filters, args, t="s"):
+    """Turn /students filters into WHERE fragments, appending their values to args ($n placeholders)."""
+    clauses = []
+
+    def param(value):
+        args.append(value)
+        return f"${len(args)}"
+
+    if filters.get("course"):
+        clauses.append(f"{t}.course = {param(filters['course'])}")
+    if filters.get("school"):
+        clauses.append(f"{t}.school = {param(filters['school'])}")
+    if filters.get("min_cgpa") is not None:
+        clauses.append(f"{t}.cgpa >= {param(filters['min_cgpa'])}")
+    if filters.get("max_cgpa") is not None:
+        clauses.append(f"{t}.cgpa <= {param(filters['max_cgpa'])}")
+    if filters.get("result_status"):
+        clauses.append(
+            f"EXISTS (SELECT 1 FROM semesters fs WHERE fs.register_no = {t}.register_no "
+            f"AND fs.result_status = {param(filters['result_status'])})"
+        )
+    return clauses
+
+def build_students_query(filters, sort="register_no", descending=False, after=None, limit=None, view="full"):
+    """Build the /students SQL: filtered, keyset-paginated on (sort column, register_no).
+
+    view="summary" leaves out the nested semesters/subjects aggregation."""
+    args = []
+    sort_expr = SORT_EXPRESSIONS[sort]
+    direction = "DESC" if descending else "ASC"
+    clauses = student_filter_clauses(filters, args)
+    keyset = ["{t}.register_no"] if sort == "register_no" else [sort_expr, "{t}.register_no"]
+    if after is not None:
+        sort_value, register_no = after
+        values = [register_no] if sort == "register_no" else [sort_value, register_no]
+        placeholders = []
+        for value in values:
+            args.append(value)
+            placeholders.append(f"${len(args)}")
+        columns = ", ".join(k.format(t="s") for k in keyset)
+        clauses.append(f"({columns}) {'<' if descending else '>'} ({', '.join(placeholders)})")
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    order = "ORDER BY " + ", ".join(f"{k} {direction}" for k in keyset)
+    limit_sql = ""
+    if limit is not None:
+        args.append(limit)
+        limit_sql = f"LIMIT ${len(args)}"
+
+    page = f"SELECT {STUDENT_COLUMNS.format(t='s')} FROM students s {where} {order.format(t='s')} {limit_sql}"
+    if view == "summary":
+        return page, args
+
+    query = f"""
+        WITH page AS ({page})
+        SELECT {STUDENT_COLUMNS.format(t='p')},
+        {SEMESTERS_JSON.format(t='p')}
+        FROM page p
+        LEFT JOIN semesters sem ON p.register_no = sem.register_no
+        GROUP BY p.register_no, p.name, p.cgpa, p.course, p.school, p.course_duration
+        {order.format(t='p')}
+    """
+    return query, args
+
+def next_cursor(rows, sort, limit):
+    """Cursor for the page after `rows`, or None when this was the last page."""
+    if limit is None or len(rows) < limit:
+        return None
+    last = rows[-1]
+    sort_value = {
+        "register_no": last["register_no"],
+        "name": last["name"] or "",
+        "cgpa": last["cgpa"] if last["cgpa"] is not None else -1,
+    }[sort]
+    return encode_cursor(sort_value, last["register_no"])
+
+TOP_SUBJECTS_QUERY = """
+    SELECT subject_code, subject_name, semester_no, attempts, normalized_score, grade, grade_point,
+           student_rank, cohort_percentile
+    FROM student_subject_results
+    WHERE register_no = $1 AND normalized_score IS NOT NULL
+    ORDER BY student_rank {direction}, subject_code
+    LIMIT $2;
+"""
+
+COMPARE_STUDENTS_QUERY = """
+    SELECT s.register_no, s.name, s.cgpa, s.course, s.school,
+           (SELECT jsonb_agg(jsonb_build_object(
+                       'sequence', o.sequence, 'semester_no', o.semester_no, 'attempt_no', o.attempt_no,
+                       'is_backlog', o.is_backlog, 'passing_year', o.passing_year,
+                       'passing_month', o.passing_month, 'sgpa', o.sgpa, 'result_status', o.result_status)
+                   ORDER BY o.sequence)
+            FROM student_semester_order o WHERE o.register_no = s.register_no) AS semesters
+    FROM students s
+    WHERE s.register_no = ANY($1::text[]);
+"""
+
+COMPARE_SUBJECTS_QUERY = """
+    SELECT register_no, subject_code, subject_name, normalized_score, grade, cohort_percentile
+    FROM student_subject_results
+    WHERE register_no = ANY($1::text[])
+    ORDER BY subject_code, register_no;
+"""
+
+SUBJECT_DISTRIBUTION_QUERY = """
+    SELECT subject_code, subject_name, students, mean_score, p25, p50, p75, p90, pass_rate,
+           grade_histogram, score_histogram, updated_at
+    FROM subject_cohort_stats
+    WHERE subject_code = $1;
+"""
+
+# Search expressions; they must match the migration 7 index expressions exactly to use the indexes
+STUDENT_SEARCH_TEXT = "lower(register_no || ' ' || COALESCE(name, '') || ' ' || COALESCE(course, '') || ' ' || COALESCE(school, ''))"
+STUDENT_SEARCH_DOC = "to_tsvector('simple', register_no || ' ' || COALESCE(name, '') || ' ' || COALESCE(course, '') || ' ' || COALESCE(school, ''))"
+SUBJECT_SEARCH_TEXT = "lower(subject_code || ' ' || COALESCE(subject_name, ''))"
+SUBJECT_SEARCH_DOC = "to_tsvector('simple', subject_code || ' ' || COALESCE(subject_name, ''))"
+
+# $1 normalized query, $2 prefix tsquery, $3 'query%', $4 '%query%', $5 limit.
+# A row matches when every word is a prefix of one of its words (full-text), when the query is a
+# close trigram match for part of it (typos), or when it contains the query verbatim. Ranked by
+# trigram closeness, plus a bonus for full-text matches and for the key column matching exactly or by prefix.
+SEARCH_QUERY_TEMPLATE = """
+    SELECT {columns},
+           round((word_similarity($1, {text})
+                  + CASE WHEN {doc} @@ to_tsquery('simple', $2) THEN 0.5 ELSE 0 END
+                  + CASE WHEN lower({key}) = $1 THEN 2 WHEN lower({key}) LIKE $3 THEN 1 ELSE 0 END)::numeric, 3) AS score
+    FROM {table}
+    WHERE {doc} @@ to_tsquery('simple', $2)
+       OR $1 <% {text}
+       OR {text} LIKE $4
+    ORDER BY score DESC, {key}
+    LIMIT $5;
+"""
+
+SEARCH_STUDENTS_QUERY = SEARCH_QUERY_TEMPLATE.format(
+    columns="register_no, name, cgpa, course, school", table="students", key="register_no",
+    text=STUDENT_SEARCH_TEXT, doc=STUDENT_SEARCH_DOC,
+)
+SEARCH_SUBJECTS_QUERY = SEARCH_QUERY_TEMPLATE.format(
+    columns="subject_code, subject_name, students, mean_score, pass_rate", table="subject_cohort_stats",
+    key="subject_code", text=SUBJECT_SEARCH_TEXT, doc=SUBJECT_SEARCH_DOC,
+)
+
+def search_args(q, limit):
+    """Arguments for the SEARCH_*_QUERY statements, or None when q has no searchable words."""
+    normalized = " ".join(q.lower().split())
+    words = re.findall(r"\w+", normalized)
+    if not words:
+        return None
+    # \w-only words cannot carry tsquery operators
+    tsquery = " & ".join(f"{word}:*" for word in words)
+    escaped = normalized.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return [normalized, tsquery, f"{escaped}%", f"%{escaped}%", limit]
@@ -1,16 +1,48 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 import asyncio
-import sys
-import subprocess
-from pathlib import Path
-from backend.database.db_connection_asyncpg import get_db_connection
-from backend.scraper.fetcher import main as fetcher_main
+import json
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+from backend.database.db_connection_asyncpg import acquire, init_pool, close_pool, check_pool_health, get_pool_stats
+from backend.api.jobs import job_manager
+from backend.database import job_queue
+from backend.api.cache import etag_matches, response_cache, listen_for_invalidations
+from backend.lib.cohort_stats import cohort_stats, records
+from backend.api.export import EXPORTS, FORMATS, stream_export
+from backend.lib.telemetry import API_REQUEST_SECONDS, configure_logging, register_snapshot
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from backend.api.queries import (
+    build_students_query, decode_cursor, next_cursor, SGPA_PROGRESSION_QUERY, TOP_SUBJECTS_QUERY,
+    COMPARE_STUDENTS_QUERY, COMPARE_SUBJECTS_QUERY, SUBJECT_DISTRIBUTION_QUERY,
+    SEARCH_STUDENTS_QUERY, SEARCH_SUBJECTS_QUERY, search_args,
+)
 from pydantic import BaseModel
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_pool()
+    listener = asyncio.create_task(listen_for_invalidations(cohort_stats.mark_stale))
+    job_manager.start()
+    yield
+    await job_manager.stop()
+    listener.cancel()
+    await close_pool()
+
+configure_logging()
+app = FastAPI(lifespan=lifespan)
+register_snapshot("api_pool", get_pool_stats)
+register_snapshot("api_cache", response_cache.stats)
+register_snapshot("scrape_jobs", job_manager.counts)
+
+# Rows fetched per round trip when streaming from a server-side cursor
+STREAM_PREFETCH = 500
+MAX_COMPARE_IDS = 10
+# pg_trgm word similarity needed for a typo-tolerant /search match (the extension defaults to 0.6)
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.4"))
 
 # Configure CORS
 app.add_middleware(
@@ -19,122 +51,336 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+class RequestTimer:
+    """Pure ASGI middleware timing each HTTP request until its last body chunk is sent, so streamed
+    responses (exports, event streams) are timed in full rather than up to their headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        observed = False
+
+        def observe():
+            nonlocal observed
+            if observed:
+                return
+            observed = True
+            # The route template, not the raw path, so /students/{register_no} is one series
+            route = scope.get("route")
+            API_REQUEST_SECONDS.labels(route.path if route else "unmatched", scope["method"], status).observe(
+                time.perf_counter() - started
+            )
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            # Errors and client disconnects end the request without a final body chunk
+            observe()
+
+app.add_middleware(RequestTimer)
+
 class Credentials(BaseModel):
     username: str
     password: str
+    incremental: bool = False
+
+class QueuedScrape(Credentials):
+    retry_failed: bool = False
+
+def cached_response(request: Request, body: bytes, etag: str, headers: dict):
+    """Serve a cached body, or a bodiless 304 when the client already has this ETag."""
+    headers = {**headers, "ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def student_filters(
+    course: Optional[str] = None,
+    school: Optional[str] = None,
+    min_cgpa: Optional[float] = None,
+    max_cgpa: Optional[float] = None,
+    result_status: Optional[str] = None,
+):
+    return {"course": course, "school": school, "min_cgpa": min_cgpa, "max_cgpa": max_cgpa, "result_status": result_status}
 
 @app.get("/students")
-async def get_students():
-    query = """
-    SELECT 
-    s.register_no, 
-    s.name, 
-    s.cgpa, 
-    s.course, 
-    s.school, 
-    s.course_duration,
-    jsonb_agg(
-        jsonb_build_object(
-            'exam_schedule_timetable_id', sem.exam_schedule_timetable_id,
-            'semester_no', sem.semester_no,
-            'result_status', sem.result_status,
-            'block_status', sem.block_status,
-            'block_reason', sem.block_reason,
-            'ordinance', sem.ordinance,
-            'passing_year', sem.passing_year,
-            'passing_month', sem.passing_month,
-            'sgpa', sem.sgpa,
-            'total_credits', sem.total_credits,
-            'earned_credits', sem.earned_credits,
-            'obtained_marks', sem.obtained_marks,
-            'out_of_marks', sem.out_of_marks,
-            'subjects', (
-                SELECT jsonb_agg(
-                    jsonb_build_object(
-                        'subject_code', sub.subject_code,
-                        'subject_name', sub.subject_name,
-                        'internal_marks', sub.internal_marks,
-                        'internal_passing_marks', sub.internal_passing_marks,
-                        'max_internal_marks', sub.max_internal_marks,
-                        'external_marks', sub.external_marks,
-                        'external_passing_marks', sub.external_passing_marks,
-                        'max_external_marks', sub.max_external_marks,
-                        'grade', sub.grade,
-                        'grade_point', sub.grade_point,
-                        'credits_obtained', sub.credits_obtained,
-                        'max_credits', sub.max_credits
-                    )
-                ) 
-                FROM subjects sub 
-                WHERE 
-                    sub.register_no = s.register_no 
-                    AND sub.semester_no = sem.semester_no
-                    AND sub.exam_schedule_timetable_id = sem.exam_schedule_timetable_id
-            )
-        )
-    ) FILTER (WHERE sem.register_no IS NOT NULL) AS semesters
-FROM students s
-LEFT JOIN semesters sem ON s.register_no = sem.register_no
-GROUP BY s.register_no;
+async def get_students(
+    request: Request,
+    filters: dict = Depends(student_filters),
+    sort: Literal["register_no", "name", "cgpa"] = "register_no",
+    order: Literal["asc", "desc"] = "asc",
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    view: Literal["full", "summary"] = "full",
+):
+    """Students with their semesters and subjects. Pass `limit` to page through with the
+    `X-Next-Cursor` response header as the next request's `after`."""
+    try:
+        cursor = decode_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    async def compute():
+        query, args = build_students_query(filters, sort, order == "desc", cursor, limit, view)
+        async with acquire() as conn:
+            rows = await conn.fetch(query, *args)
+        next_page = next_cursor(rows, sort, limit)
+        return [dict(r) for r in rows], {"X-Next-Cursor": next_page} if next_page else {}
+
+    params = {**filters, "sort": sort, "order": order, "after": after, "limit": limit, "view": view}
+    body, etag, headers = await response_cache.get_or_compute("students", compute, params=params)
+    return cached_response(request, body, etag, headers)
+
+@app.get("/students/stream")
+async def stream_students(
+    filters: dict = Depends(student_filters),
+    sort: Literal["register_no", "name", "cgpa"] = "register_no",
+    order: Literal["asc", "desc"] = "asc",
+    view: Literal["full", "summary"] = "full",
+):
+    """Same rows as /students, streamed as NDJSON straight from a server-side cursor."""
+    query, args = build_students_query(filters, sort, order == "desc", view=view)
+
+    async def rows():
+        async with acquire() as conn:
+            async with conn.transaction():
+                async for row in conn.cursor(query, *args, prefetch=STREAM_PREFETCH):
+                    yield json.dumps(dict(row), default=str) + "\n"
 
-    """
-    conn = await get_db_connection()
-    rows = await conn.fetch(query)
-    await conn.close()
-    return rows
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+@app.get("/export/{table}")
+async def export_table(
+    table: Literal[tuple(EXPORTS)],
+    filters: dict = Depends(student_filters),
+    format: Literal[tuple(FORMATS)] = "parquet",
+):
+    """Bulk export of a table, or the flat `results` join, filtered like /students and streamed in record batches."""
+    media_type, extension = FORMATS[format]
+
+    async def chunks():
+        async with acquire() as conn:
+            async for chunk in stream_export(conn, table, format, filters):
+                yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'},
+    )
 
 @app.get("/sgpa_progression/{register_no}")
-async def sgpa_progression(register_no: str):
-    query = """
-    SELECT semester_no, passing_year, passing_month, sgpa
-    FROM semesters
-    WHERE register_no = $1
-    ORDER BY passing_year, passing_month, semester_no;
-    """
-    # AND sgpa is NOT NULL
-    conn = await get_db_connection()
-    rows = await conn.fetch(query, register_no)
-    await conn.close()
-    return [{"semester": r["semester_no"], "year": r["passing_year"], "month": r["passing_month"], "sgpa": r["sgpa"]} for r in rows]
-
-@app.post("/api/run-fetcher")
+async def sgpa_progression(request: Request, register_no: str):
+    async def compute():
+        # AND sgpa is NOT NULL
+        async with acquire() as conn:
+            rows = await conn.fetch(SGPA_PROGRESSION_QUERY, register_no)
+        return [{"semester": r["semester_no"], "year": r["passing_year"], "month": r["passing_month"], "sgpa": r["sgpa"]} for r in rows], {}
+
+    body, etag, headers = await response_cache.get_or_compute("sgpa_progression", compute, register_no=register_no)
+    return cached_response(request, body, etag, headers)
+
+@app.get("/students/{register_no}/top-subjects")
+async def top_subjects(
+    request: Request,
+    register_no: str,
+    n: int = Query(5, ge=1, le=50),
+    kind: Literal["strong", "weak"] = "strong",
+):
+    """A student's strongest (or weakest) subjects by normalized marks, latest attempt only."""
+    async def compute():
+        query = TOP_SUBJECTS_QUERY.format(direction="ASC" if kind == "strong" else "DESC")
+        async with acquire() as conn:
+            rows = await conn.fetch(query, register_no, n)
+        return [dict(r) for r in rows], {}
+
+    body, etag, headers = await response_cache.get_or_compute(
+        "top_subjects", compute, register_no=register_no, params={"n": n, "kind": kind})
+    return cached_response(request, body, etag, headers)
+
+@app.get("/compare")
+async def compare_students(request: Request, ids: str = Query(..., description="Comma-separated register numbers")):
+    """Side-by-side semester progression and per-subject scores for several students."""
+    register_nos = sorted({i.strip() for i in ids.split(",") if i.strip()})
+    if not 2 <= len(register_nos) <= MAX_COMPARE_IDS:
+        raise HTTPException(status_code=400, detail=f"Pass between 2 and {MAX_COMPARE_IDS} register numbers")
+
+    async def compute():
+        async with acquire() as conn:
+            students = await conn.fetch(COMPARE_STUDENTS_QUERY, register_nos)
+            subject_rows = await conn.fetch(COMPARE_SUBJECTS_QUERY, register_nos)
+        subjects = {}
+        for r in subject_rows:
+            entry = subjects.setdefault(r["subject_code"], {"subject_code": r["subject_code"], "subject_name": r["subject_name"], "scores": {}})
+            entry["scores"][r["register_no"]] = {
+                "normalized_score": r["normalized_score"], "grade": r["grade"], "cohort_percentile": r["cohort_percentile"],
+            }
+        return {
+            "students": [{**dict(r), "semesters": json.loads(r["semesters"]) if r["semesters"] else []} for r in students],
+            "subjects": list(subjects.values()),
+        }, {}
+
+    body, etag, headers = await response_cache.get_or_compute("compare", compute, params={"ids": ",".join(register_nos)})
+    return cached_response(request, body, etag, headers)
+
+@app.get("/cohort/subject/{subject_code}/distribution")
+async def subject_distribution(request: Request, subject_code: str):
+    """Cohort-wide score percentiles, pass rate and grade/score histograms for one subject."""
+    async def compute():
+        async with acquire() as conn:
+            row = await conn.fetchrow(SUBJECT_DISTRIBUTION_QUERY, subject_code)
+        if row is None:
+            raise HTTPException(status_code=404, detail="No results for this subject")
+        result = dict(row)
+        result["grade_histogram"] = json.loads(row["grade_histogram"] or "{}")
+        result["score_histogram"] = json.loads(row["score_histogram"] or "{}")
+        return result, {}
+
+    body, etag, headers = await response_cache.get_or_compute("subject_distribution", compute, params={"subject_code": subject_code})
+    return cached_response(request, body, etag, headers)
+
+@app.get("/cohort/stats")
+async def cohort_subject_stats():
+    """Per-subject pass rates, score percentiles and grade histograms over the whole cohort."""
+    stats = await cohort_stats.get(acquire)
+    subjects = records(stats["subjects"])
+    for subject in subjects:
+        subject["grade_histogram"] = stats["grade_histograms"].get(subject["subject_code"], {})
+    return {"generated_at": cohort_stats.generated_at, "compute_ms": cohort_stats.compute_ms, "subjects": subjects}
+
+@app.get("/cohort/sgpa_trends")
+async def cohort_sgpa_trends(
+    limit: int = Query(50, ge=1, le=1000),
+    order: Literal["improving", "declining"] = "improving",
+):
+    """Students ranked by the slope of their SGPA over successive sittings."""
+    stats = await cohort_stats.get(acquire)
+    trends = stats["sgpa_trends"].dropna(subset=["slope"])
+    trends = trends.nlargest(limit, "slope") if order == "improving" else trends.nsmallest(limit, "slope")
+    return {"generated_at": cohort_stats.generated_at, "students": records(trends)}
+
+@app.get("/cohort/students/{register_no}")
+async def cohort_student_standing(register_no: str):
+    """Where one student stands in each subject's cohort, plus their SGPA trend."""
+    stats = await cohort_stats.get(acquire)
+    subjects = stats["student_subjects"]
+    trend = stats["sgpa_trends"]
+    standing = subjects[subjects["register_no"] == register_no]
+    trend = trend[trend["register_no"] == register_no]
+    if standing.empty and trend.empty:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return {
+        "register_no": register_no,
+        "subjects": records(standing.drop(columns="register_no")),
+        "sgpa_trend": records(trend.drop(columns="register_no"))[0] if not trend.empty else None,
+    }
+
+@app.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    scope: Literal["all", "students", "subjects"] = "all",
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Typeahead over student register_no, name, course and school and over subject code and name:
+    word-prefix and typo-tolerant, best matches first. Not cached; typeahead keys rarely repeat."""
+    args = search_args(q, limit)
+    results = {"query": q, "students": [], "subjects": []}
+    if args is None:
+        return results
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', $1, true)", str(SEARCH_SIMILARITY_THRESHOLD)
+            )
+            if scope in ("all", "students"):
+                results["students"] = [dict(r) for r in await conn.fetch(SEARCH_STUDENTS_QUERY, *args)]
+            if scope in ("all", "subjects"):
+                results["subjects"] = [dict(r) for r in await conn.fetch(SEARCH_SUBJECTS_QUERY, *args)]
+    return results
+
+@app.get("/health")
+async def health():
+    try:
+        await check_pool_health()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {e}")
+    return {"status": "ok"}
+
+@app.get("/pool_stats")
+async def pool_stats():
+    return get_pool_stats()
+
+@app.get("/cache_stats")
+async def cache_stats():
+    return response_cache.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus exposition of scrape, ingest and API histograms plus pool, cache and job gauges."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.post("/api/run-fetcher", status_code=202)
 async def run_fetcher(credentials: Credentials):
+    """Queue a scrape and return its job id immediately; follow it at /api/jobs/{job_id}/events."""
+    job, coalesced = job_manager.submit(credentials.username, credentials.password, credentials.incremental)
+    return {**job.summary(), "coalesced": coalesced}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.summary()
+
+@app.post("/api/queue/jobs", status_code=202)
+async def queue_scrape(request: QueuedScrape):
+    """Queue a scrape for the standalone workers (python -m backend.scraper.worker) instead of this process."""
     try:
-        # Use the same Python executable that's running this FastAPI app
-        python_executable = sys.executable
-        
-        # Set up environment with UTF-8 encoding
-        env = os.environ.copy()
-        env["PYTHONIOENCODING"] = "utf-8"
-        
-        # Run the fetcher script using the virtual environment's Python
-        result = subprocess.run(
-            [python_executable, "-c", 
-             f"from backend.scraper.fetcher import main; main('{credentials.username}', '{credentials.password}')"],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=str(Path(__file__).parent.parent.parent),  # Run from project root
-            env=env
+        job_id, coalesced = await asyncio.to_thread(
+            job_queue.run_in_transaction, job_queue.enqueue_job,
+            request.username, request.password, request.incremental, request.retry_failed,
         )
-        
-        return {
-            "output": result.stdout,
-            "error": result.stderr,
-            "success": True
-        }
-        
-    except subprocess.CalledProcessError as e:
-        return {
-            "output": e.stdout,
-            "error": e.stderr,
-            "success": False
-        }
-    except Exception as e:
-        return {
-            "output": "",
-            "error": str(e),
-            "success": False
-        }
\ No newline at end of file
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job_id, "coalesced": coalesced}
+
+@app.get("/api/queue/jobs/{job_id}")
+async def get_queued_scrape(job_id: int):
+    job = await asyncio.to_thread(job_queue.run_in_transaction, job_queue.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/queue/stats")
+async def queue_stats():
+    return await asyncio.to_thread(job_queue.run_in_transaction, job_queue.queue_counts)
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: the job's history so far, then live progress until it finishes."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for event in job.stream():
+            yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
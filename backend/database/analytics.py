@@ -0,0 +1,157 @@
+# Incremental maintenance of the analytics tables created in migration 4. Each refresh rebuilds
+# only the rows of the students that changed, then, in a separate transaction, the cohort stats of
+# the subjects they touch. Every lock on student_subject_results rows is taken in
+# (subject_code, register_no) order so concurrent ingests and cohort refreshes cannot deadlock.
+from backend.database.notifications import notify_cohort_changes
+
+# Marks as a fraction of the maximum, comparable across subjects with different mark schemes
+NORMALIZED_SCORE = """
+    (COALESCE(sub.internal_marks, 0) + COALESCE(sub.external_marks, 0))
+    / NULLIF(COALESCE(sub.max_internal_marks, 0) + COALESCE(sub.max_external_marks, 0), 0)
+"""
+
+REFRESH_SUBJECT_RESULTS = f"""
+    INSERT INTO student_subject_results (register_no, subject_code, subject_name, semester_no,
+                                         exam_schedule_timetable_id, attempts, normalized_score,
+                                         grade, grade_point, student_rank)
+    SELECT register_no, subject_code, subject_name, semester_no, exam_schedule_timetable_id, attempts,
+           normalized_score, grade, grade_point,
+           RANK() OVER (PARTITION BY register_no ORDER BY normalized_score DESC NULLS LAST)
+    FROM (
+        -- a re-attempted (backlog) subject counts with its latest sitting only
+        SELECT DISTINCT ON (sub.register_no, sub.subject_code)
+               sub.register_no, sub.subject_code, sub.subject_name, sub.semester_no, sub.exam_schedule_timetable_id,
+               COUNT(*) OVER (PARTITION BY sub.register_no, sub.subject_code) AS attempts,
+               {NORMALIZED_SCORE} AS normalized_score,
+               sub.grade, sub.grade_point
+        FROM subjects sub
+        WHERE sub.register_no = ANY(%(register_nos)s)
+        ORDER BY sub.register_no, sub.subject_code, sub.exam_schedule_timetable_id DESC
+    ) latest
+"""
+
+REFRESH_SEMESTER_ORDER = """
+    INSERT INTO student_semester_order (register_no, exam_schedule_timetable_id, semester_no, sequence, attempt_no,
+                                        is_backlog, passing_year, passing_month, sgpa, result_status)
+    SELECT register_no, exam_schedule_timetable_id, semester_no,
+           ROW_NUMBER() OVER (PARTITION BY register_no ORDER BY exam_schedule_timetable_id, semester_no),
+           ROW_NUMBER() OVER (PARTITION BY register_no, semester_no ORDER BY exam_schedule_timetable_id) AS attempt_no,
+           ROW_NUMBER() OVER (PARTITION BY register_no, semester_no ORDER BY exam_schedule_timetable_id) > 1,
+           passing_year, passing_month, sgpa, result_status
+    FROM semesters
+    WHERE register_no = ANY(%(register_nos)s)
+"""
+
+REFRESH_COHORT_STATS = """
+    INSERT INTO subject_cohort_stats (subject_code, subject_name, students, mean_score, p25, p50, p75, p90,
+                                      pass_rate, grade_histogram, score_histogram, updated_at)
+    SELECT r.subject_code,
+           MAX(r.subject_name),
+           COUNT(*),
+           AVG(r.normalized_score),
+           percentile_cont(0.25) WITHIN GROUP (ORDER BY r.normalized_score),
+           percentile_cont(0.50) WITHIN GROUP (ORDER BY r.normalized_score),
+           percentile_cont(0.75) WITHIN GROUP (ORDER BY r.normalized_score),
+           percentile_cont(0.90) WITHIN GROUP (ORDER BY r.normalized_score),
+           AVG(CASE WHEN r.grade_point > 0 THEN 1.0 ELSE 0.0 END),
+           (SELECT jsonb_object_agg(COALESCE(g.grade, 'N/A'), g.n)
+            FROM (SELECT grade, COUNT(*) AS n FROM student_subject_results
+                  WHERE subject_code = r.subject_code GROUP BY grade) g),
+           (SELECT jsonb_object_agg(b.bucket, b.n)
+            FROM (SELECT LEAST(width_bucket(normalized_score, 0, 1, 10), 10) AS bucket, COUNT(*) AS n
+                  FROM student_subject_results
+                  WHERE subject_code = r.subject_code AND normalized_score IS NOT NULL GROUP BY 1) b),
+           NOW()
+    FROM student_subject_results r
+    WHERE r.subject_code = ANY(%(subject_codes)s)
+    GROUP BY r.subject_code
+    ON CONFLICT (subject_code) DO UPDATE
+    SET subject_name = EXCLUDED.subject_name, students = EXCLUDED.students, mean_score = EXCLUDED.mean_score,
+        p25 = EXCLUDED.p25, p50 = EXCLUDED.p50, p75 = EXCLUDED.p75, p90 = EXCLUDED.p90,
+        pass_rate = EXCLUDED.pass_rate, grade_histogram = EXCLUDED.grade_histogram,
+        score_histogram = EXCLUDED.score_histogram, updated_at = EXCLUDED.updated_at
+"""
+
+# A new score moves everyone's percentile in that subject, so recompute it subject-wide. Only rows locked
+# by `locked`, in (subject_code, register_no) order, are updated; rows committed after that are left to
+# the refresh their own ingest runs next.
+REFRESH_COHORT_PERCENTILES = """
+    WITH locked AS MATERIALIZED (
+        SELECT register_no, subject_code
+        FROM student_subject_results
+        WHERE subject_code = ANY(%(subject_codes)s)
+        ORDER BY subject_code, register_no
+        FOR UPDATE
+    )
+    UPDATE student_subject_results r
+    SET cohort_percentile = p.pct
+    FROM locked l, (
+        SELECT register_no, subject_code,
+               PERCENT_RANK() OVER (PARTITION BY subject_code ORDER BY normalized_score NULLS FIRST) AS pct
+        FROM student_subject_results
+        WHERE subject_code = ANY(%(subject_codes)s)
+    ) p
+    WHERE r.register_no = l.register_no AND r.subject_code = l.subject_code
+      AND r.register_no = p.register_no AND r.subject_code = p.subject_code
+"""
+
+def refresh_analytics(cursor, register_nos=None):
+    """Rebuild analytics rows for the given students (all students when None) inside the caller's transaction.
+
+    Returns the subject codes whose cohort stats are now out of date; commit, then pass them to refresh_cohort_stats."""
+    if register_nos is None:
+        cursor.execute("SELECT register_no FROM students")
+        register_nos = [row[0] for row in cursor.fetchall()]
+    register_nos = list(register_nos)
+    if not register_nos:
+        return []
+    params = {"register_nos": register_nos}
+
+    cursor.execute("""
+        SELECT subject_code FROM student_subject_results
+        WHERE register_no = ANY(%(register_nos)s)
+        ORDER BY subject_code, register_no
+        FOR UPDATE
+    """, params)
+    subject_codes = {row[0] for row in cursor.fetchall()}
+    cursor.execute("DELETE FROM student_subject_results WHERE register_no = ANY(%(register_nos)s)", params)
+    cursor.execute(REFRESH_SUBJECT_RESULTS, params)
+    cursor.execute("SELECT DISTINCT subject_code FROM student_subject_results WHERE register_no = ANY(%(register_nos)s)", params)
+    subject_codes.update(row[0] for row in cursor.fetchall())
+
+    cursor.execute("DELETE FROM student_semester_order WHERE register_no = ANY(%(register_nos)s)", params)
+    cursor.execute(REFRESH_SEMESTER_ORDER, params)
+    return sorted(subject_codes)
+
+def refresh_cohort_stats(cursor, subject_codes):
+    """Recompute subject-wide stats and every student's percentile in these subjects, then tell API caches.
+
+    This locks every student's row in the subjects, so it runs in its own short transaction after the
+    ingest one commits. Stats rows, then student rows, are locked in subject_code order."""
+    subject_codes = sorted(subject_codes)
+    if not subject_codes:
+        return
+    codes = {"subject_codes": subject_codes}
+    cursor.execute("""
+        SELECT 1 FROM subject_cohort_stats WHERE subject_code = ANY(%(subject_codes)s) ORDER BY subject_code FOR UPDATE
+    """, codes)
+    # Subjects nobody has any more lose their stats row
+    cursor.execute("""
+        DELETE FROM subject_cohort_stats c
+        WHERE c.subject_code = ANY(%(subject_codes)s)
+          AND NOT EXISTS (SELECT 1 FROM student_subject_results r WHERE r.subject_code = c.subject_code)
+    """, codes)
+    cursor.execute(REFRESH_COHORT_STATS, codes)
+    cursor.execute(REFRESH_COHORT_PERCENTILES, codes)
+    # Cached per-student responses embed cohort_percentile of students who did not change themselves
+    notify_cohort_changes(cursor)
+
+# Runs only when the script is run directly and not when it is imported
+if __name__ == "__main__":
+    from backend.database.db_connection import get_db_connection
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            refresh_cohort_stats(cursor, refresh_analytics(cursor))
+        conn.commit()
+    print("✅ Analytics tables rebuilt.")
@@ -0,0 +1,154 @@
+import csv
+import io
+import logging
+import time
+from backend.database.analytics import refresh_analytics, refresh_cohort_stats
+from backend.database.db_connection import pooled_connection
+from backend.database.notifications import notify_student_changes
+from backend.database.scrape_state import clear_failed_exams, payload_hash
+from backend.database.update_cgpa import CGPA_MODE, recompute_cgpa
+from backend.lib.telemetry import span
+from backend.lib.records import SEMESTER_COLUMNS, STUDENT_COLUMNS, SUBJECT_COLUMNS, exam_key, parse_results, to_text
+
+# Student, semester and subject columns come from backend.lib.records; these match the scrape-state rows
+SCRAPED_EXAM_COLUMNS = (
+    "exam_schedule_timetable_id", "semester_no", "register_no", "username", "result_declaration_date", "content_hash",
+)
+COPY_NULL = "\\N"
+
+PRIMARY_KEYS = {
+    "students": ("register_no",),
+    "semesters": ("exam_schedule_timetable_id", "semester_no", "register_no"),
+    "subjects": ("exam_schedule_timetable_id", "subject_code", "semester_no", "register_no"),
+    "scraped_exams": ("exam_schedule_timetable_id", "semester_no", "register_no"),
+}
+
+class IngestBuffer:
+    """Collects parsed, COPY-ready rows in memory until they are bulk-loaded with flush_buffer()."""
+
+    def __init__(self):
+        self.students = []
+        self.semesters = []
+        self.subjects = []
+        self.scraped_exams = []
+        # (username, exam_schedule_timetable_id, semester_no) fetched fine; their dead letters go when this commits
+        self.recovered_exams = []
+
+    def __len__(self):
+        return len(self.semesters) + len(self.scraped_exams)
+
+    def add(self, exam, results, username=None, record_only=False):
+        """Buffer one exam's result payload. record_only just refreshes scrape state for unchanged payloads."""
+        student, semester, subjects = parse_results(exam, results)
+        if username:
+            self.scraped_exams.append((
+                *exam_key(exam), student[0], username, to_text(exam.get("resultDeclarationDate")), payload_hash(results),
+            ))
+        if record_only:
+            return
+        self.students.append(student)
+        self.semesters.append(semester)
+        self.subjects.extend(subjects)
+
+    def usernames(self):
+        """Accounts with rows in this buffer (those added with a username)."""
+        return {row[3] for row in self.scraped_exams} | {key[0] for key in self.recovered_exams}
+
+    def take(self):
+        """Move everything buffered so far into a new buffer and empty this one."""
+        taken = IngestBuffer()
+        taken.students, self.students = self.students, []
+        taken.semesters, self.semesters = self.semesters, []
+        taken.subjects, self.subjects = self.subjects, []
+        taken.scraped_exams, self.scraped_exams = self.scraped_exams, []
+        taken.recovered_exams, self.recovered_exams = self.recovered_exams, []
+        return taken
+
+def copy_into_staging(cursor, table, columns, rows):
+    """Create a temp table shaped like `table` and COPY the rows into it, each with its position in `rows` as staging_seq."""
+    staging = f"staging_{table}"
+    cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS, staging_seq INT) ON COMMIT DROP")
+    buf = io.StringIO()
+    csv.writer(buf).writerows([*(COPY_NULL if value is None else value for value in row), seq] for seq, row in enumerate(rows))
+    buf.seek(0)
+    cursor.copy_expert(
+        f"COPY {staging} ({', '.join(columns)}, staging_seq) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buf
+    )
+    return staging
+
+def merge_from_staging(cursor, table, staging, columns, upsert):
+    """One set-based INSERT ... SELECT ... ON CONFLICT from the staging table into the real one."""
+    key = PRIMARY_KEYS[table]
+    cols = ", ".join(columns)
+    changing = [c for c in columns if c not in key]
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in changing)
+    # Rows that are already identical are left alone, so an upsert of unchanged data writes nothing
+    distinct = f"({', '.join(f'{table}.{c}' for c in changing)}) IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in changing)})"
+    conflict = f"DO UPDATE SET {updates} WHERE {distinct}" if upsert and changing else "DO NOTHING"
+    # DISTINCT ON keeps one row per key, the one buffered last; DO UPDATE cannot touch the same row twice in one statement
+    cursor.execute(f"""
+        INSERT INTO {table} ({cols})
+        SELECT DISTINCT ON ({', '.join(key)}) {cols} FROM {staging}
+        WHERE {' AND '.join(f'{k} IS NOT NULL' for k in key)}
+        ORDER BY {', '.join(key)}, staging_seq DESC
+        ON CONFLICT ({', '.join(key)}) {conflict}
+    """)
+    return cursor.rowcount
+
+def flush_buffer(buffer, upsert=False):
+    """Bulk-load a buffer with COPY and merge it into students, semesters, subjects and scraped_exams in one transaction,
+    clearing the dead letters of its recovered exams in the same transaction.
+
+    Rows are upserted whenever the buffer carries scrape state: scraped_exams always takes the new payload hash,
+    and incremental runs trust that hash, so the rows it describes must be the ones stored."""
+    if not len(buffer) and not buffer.recovered_exams:
+        return {"rows": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+
+    started = time.perf_counter()
+    tables = [
+        ("students", STUDENT_COLUMNS, buffer.students),
+        ("semesters", SEMESTER_COLUMNS, buffer.semesters),
+        ("subjects", SUBJECT_COLUMNS, buffer.subjects),
+        # scraped_exams references semesters, so it is merged last
+        ("scraped_exams", SCRAPED_EXAM_COLUMNS, buffer.scraped_exams),
+    ]
+    total_rows = sum(len(rows) for _, _, rows in tables)
+    upsert = upsert or bool(buffer.scraped_exams)
+
+    with span("ingest_batch", rows=total_rows), pooled_connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                for table, columns, rows in tables:
+                    if not rows:
+                        continue
+                    staging = copy_into_staging(cursor, table, columns, rows)
+                    merge_from_staging(cursor, table, staging, columns, upsert)
+                clear_failed_exams(buffer.recovered_exams, cursor)
+
+                changed = sorted({row[2] for row in buffer.semesters if row[2] is not None})
+                # One grouped UPDATE for every student touched by this batch
+                if CGPA_MODE != "trigger":
+                    recompute_cgpa(cursor, changed)
+                stale_subjects = refresh_analytics(cursor, changed)
+                notify_student_changes(cursor, changed)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        # Subject-wide, so in its own transaction once the rows above are committed (see analytics.py)
+        try:
+            with conn.cursor() as cursor:
+                refresh_cohort_stats(cursor, stale_subjects)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logging.exception("Cohort stats refresh failed; they stay stale until these subjects change again")
+
+    seconds = time.perf_counter() - started
+    stats = {"rows": total_rows, "seconds": round(seconds, 3), "rows_per_sec": round(total_rows / seconds, 1) if seconds else 0.0}
+    print(f"📥 Bulk-loaded {total_rows} rows in {seconds:.2f}s ({stats['rows_per_sec']} rows/sec)")
+    return stats
+
+if __name__ == "__main__":
+    flush_buffer(IngestBuffer())
@@ -1,7 +1,23 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import ThreadedConnectionPool
 from backend.database.db_config import DB_CONFIG
+from backend.database.pool_metrics import PoolMetrics
 import logging
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait for a free connection instead
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+pool_metrics = PoolMetrics()
+
 def get_db_connection():
     """Establishes and returns a PostgreSQL database connection."""
     try:
@@ -11,5 +27,73 @@ def get_db_connection():
         logging.error(f"Database connection failed: {e}")
         raise
 
+def get_pool():
+    """Returns the process-wide psycopg2 connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    _pool = ThreadedConnectionPool(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, **DB_CONFIG)
+                except psycopg2.Error as e:
+                    logging.error(f"Database pool creation failed: {e}")
+                    raise
+    return _pool
+
+def is_alive(conn):
+    """Round-trip check: conn.closed only notices drops psycopg2 has already run into, not a server
+    restart or a network cut while the connection sat idle in the pool."""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+@contextmanager
+def pooled_connection():
+    """Borrow a connection from the pool. Any uncommitted transaction is rolled back when it is returned."""
+    pool = get_pool()
+    pool_metrics.start_wait()
+    started = time.perf_counter()
+    try:
+        _pool_slots.acquire()
+        # Health check: replace connections the server has dropped. After a restart every pooled connection
+        # is dead, so keep going until one answers; opening a new one raises if the server is still down.
+        for _ in range(DB_POOL_MAX_SIZE + 1):
+            conn = pool.getconn()
+            if is_alive(conn):
+                break
+            pool.putconn(conn, close=True)
+        else:
+            raise psycopg2.OperationalError("No live database connection could be obtained from the pool")
+    except Exception:
+        pool_metrics.wait_failed()
+        _pool_slots.release()
+        raise
+    pool_metrics.acquired(time.perf_counter() - started)
+    broken = False
+    try:
+        yield conn
+    except psycopg2.OperationalError:
+        # The connection may have died mid-query without psycopg2 marking it closed; never reuse it
+        broken = True
+        raise
+    finally:
+        broken = broken or bool(conn.closed) or conn.info.transaction_status == TRANSACTION_STATUS_UNKNOWN
+        pool.putconn(conn, close=broken)
+        pool_metrics.released()
+        _pool_slots.release()
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
 if __name__ == "__main__":
-    get_db_connection()
\ No newline at end of file
+    get_db_connection()
@@ -1,12 +1,86 @@
+import os
+import time
+from contextlib import asynccontextmanager
 import asyncpg
+from backend.database.db_config import get_db_config
+from backend.database.pool_metrics import PoolMetrics
+from backend.lib.telemetry import observe_query
+
+API_POOL_MIN_SIZE = int(os.getenv("API_POOL_MIN_SIZE", "2"))
+API_POOL_MAX_SIZE = int(os.getenv("API_POOL_MAX_SIZE", "10"))
+# Prepared statements cached per connection
+API_STATEMENT_CACHE_SIZE = int(os.getenv("API_STATEMENT_CACHE_SIZE", "100"))
+# Idle connections older than this are closed and reopened on demand
+API_POOL_MAX_INACTIVE_SECONDS = float(os.getenv("API_POOL_MAX_INACTIVE_SECONDS", "300"))
+
+_pool = None
+pool_metrics = PoolMetrics()
+
+def _connect_kwargs():
+    config = get_db_config()
+    return {
+        "database": config["dbname"],
+        "user": config["user"],
+        "password": config["password"],
+        "host": config["host"],
+        "port": int(config["port"]),
+    }
+
 async def get_db_connection():
-    return await asyncpg.connect(
-        database="cmr_student_database",  # Change "dbname" to "database"
-        user="postgres",
-        password="venkatesh",
-        host="localhost",
-        port="5432" 
-    )
+    return await asyncpg.connect(**_connect_kwargs())
+
+async def _init_connection(conn):
+    conn.add_query_logger(observe_query)
+
+async def init_pool():
+    """Create the app-wide asyncpg pool. Called once from the API lifespan."""
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            **_connect_kwargs(),
+            min_size=API_POOL_MIN_SIZE,
+            max_size=API_POOL_MAX_SIZE,
+            statement_cache_size=API_STATEMENT_CACHE_SIZE,
+            max_inactive_connection_lifetime=API_POOL_MAX_INACTIVE_SECONDS,
+            init=_init_connection,
+        )
+    return _pool
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+@asynccontextmanager
+async def acquire():
+    """Borrow a pooled connection, recording wait time and in-use counts."""
+    pool = await init_pool()
+    pool_metrics.start_wait()
+    started = time.perf_counter()
+    try:
+        conn = await pool.acquire()
+    except BaseException:
+        pool_metrics.wait_failed()
+        raise
+    pool_metrics.acquired(time.perf_counter() - started)
+    try:
+        yield conn
+    finally:
+        pool_metrics.released()
+        await pool.release(conn)
+
+async def check_pool_health():
+    """Round-trip a trivial query through the pool; raises if the database is unreachable."""
+    async with acquire() as conn:
+        return await conn.fetchval("SELECT 1") == 1
+
+def get_pool_stats():
+    stats = pool_metrics.snapshot()
+    if _pool is not None:
+        stats.update(size=_pool.get_size(), idle=_pool.get_idle_size(),
+                     min_size=_pool.get_min_size(), max_size=_pool.get_max_size())
+    return stats
 
 if __name__ == "__main__":
-    get_db_connection()
\ No newline at end of file
+    get_db_connection()
@@ -0,0 +1,159 @@
+import os
+from cryptography.fernet import Fernet, InvalidToken
+from psycopg2.extras import Json
+from backend.database.db_connection import pooled_connection
+
+# Fernet key for the passwords stored with queued jobs; defaults to the session cache key
+SCRAPE_QUEUE_KEY = os.getenv("SCRAPE_QUEUE_KEY") or os.getenv("SESSION_CACHE_KEY")
+# Attempts before a job is marked failed; a worker dying mid-job counts as one
+JOB_MAX_ATTEMPTS = int(os.getenv("SCRAPE_JOB_MAX_ATTEMPTS", "3"))
+# Retry backoff: base * 2^(attempts - 1) seconds, capped
+JOB_RETRY_BASE_SECONDS = float(os.getenv("SCRAPE_JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("SCRAPE_JOB_RETRY_MAX_SECONDS", "600"))
+
+ACTIVE = "status IN ('queued', 'running')"
+JOB_COLUMNS = ("id", "username", "incremental", "retry_failed", "status", "attempts", "max_attempts", "run_after",
+               "worker_id", "lease_expires_at", "heartbeat_at", "last_error", "result", "created_at", "started_at",
+               "finished_at")
+
+def _fernet():
+    if not SCRAPE_QUEUE_KEY:
+        raise RuntimeError("Set SCRAPE_QUEUE_KEY (or SESSION_CACHE_KEY) to a Fernet key before queueing scrapes.")
+    return Fernet(SCRAPE_QUEUE_KEY)
+
+def encrypt_password(password):
+    return _fernet().encrypt(password.encode()).decode()
+
+def decrypt_password(token):
+    try:
+        return _fernet().decrypt(token.encode()).decode()
+    except InvalidToken:
+        raise RuntimeError("Queued credentials cannot be decrypted with the current SCRAPE_QUEUE_KEY.") from None
+
+def run_in_transaction(fn, *args):
+    """Call fn(*args, cursor) on a pooled connection and commit."""
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            result = fn(*args, cursor)
+        conn.commit()
+    return result
+
+def enqueue_job(username, password, incremental, retry_failed, cursor, max_attempts=JOB_MAX_ATTEMPTS):
+    """Queue a scrape, or return the account's queued or running job. Returns (job id, coalesced)."""
+    token = encrypt_password(password)
+    # Twice: the active job can finish between the conflicting INSERT and the SELECT
+    for _ in range(2):
+        cursor.execute(f"""
+            INSERT INTO scrape_jobs (username, credentials, incremental, retry_failed, max_attempts)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (username) WHERE {ACTIVE} DO NOTHING
+            RETURNING id
+        """, (username, token, incremental, retry_failed, max_attempts))
+        row = cursor.fetchone()
+        if row:
+            return row[0], False
+        cursor.execute(f"SELECT id FROM scrape_jobs WHERE username = %s AND {ACTIVE}", (username,))
+        row = cursor.fetchone()
+        if row:
+            return row[0], True
+    raise RuntimeError(f"Could not queue a scrape for {username}")
+
+def requeue_expired(cursor):
+    """Hand jobs whose worker stopped heartbeating back to the queue, or fail them when out of attempts."""
+    cursor.execute("""
+        UPDATE scrape_jobs
+        SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+            credentials = CASE WHEN attempts >= max_attempts THEN NULL ELSE credentials END,
+            finished_at = CASE WHEN attempts >= max_attempts THEN NOW() END,
+            last_error = 'lease expired on ' || COALESCE(worker_id, 'unknown worker'),
+            worker_id = NULL,
+            lease_expires_at = NULL
+        WHERE status = 'running' AND lease_expires_at < NOW()
+    """)
+    return cursor.rowcount
+
+def claim_job(worker_id, lease_seconds, cursor):
+    """Lease the oldest runnable job to worker_id. SKIP LOCKED lets any number of workers claim concurrently
+    without blocking on, or double-claiming, each other's rows. Returns the job as a dict, or None."""
+    requeue_expired(cursor)
+    cursor.execute("""
+        UPDATE scrape_jobs
+        SET status = 'running',
+            worker_id = %s,
+            attempts = attempts + 1,
+            lease_expires_at = NOW() + make_interval(secs => %s),
+            heartbeat_at = NOW(),
+            started_at = COALESCE(started_at, NOW())
+        WHERE id = (
+            SELECT id FROM scrape_jobs
+            WHERE status = 'queued' AND run_after <= NOW()
+            ORDER BY run_after, id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, username, credentials, incremental, retry_failed, attempts, max_attempts
+    """, (worker_id, lease_seconds))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip(("id", "username", "credentials", "incremental", "retry_failed", "attempts", "max_attempts"), row))
+
+def heartbeat_job(job_id, worker_id, lease_seconds, cursor):
+    """Extend the lease. False means the lease expired and the job was handed to another worker."""
+    cursor.execute("""
+        UPDATE scrape_jobs
+        SET lease_expires_at = NOW() + make_interval(secs => %s), heartbeat_at = NOW()
+        WHERE id = %s AND worker_id = %s AND status = 'running'
+    """, (lease_seconds, job_id, worker_id))
+    return cursor.rowcount == 1
+
+def complete_job(job_id, worker_id, result, cursor):
+    cursor.execute("""
+        UPDATE scrape_jobs
+        SET status = 'succeeded', result = %s, credentials = NULL, last_error = NULL,
+            lease_expires_at = NULL, finished_at = NOW()
+        WHERE id = %s AND worker_id = %s AND status = 'running'
+    """, (Json(result), job_id, worker_id))
+    return cursor.rowcount == 1
+
+def fail_job(job_id, worker_id, error, cursor):
+    """Requeue with exponential backoff, or mark failed once out of attempts. Returns the new status,
+    or None when this worker no longer holds the job."""
+    cursor.execute("""
+        UPDATE scrape_jobs
+        SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+            credentials = CASE WHEN attempts >= max_attempts THEN NULL ELSE credentials END,
+            finished_at = CASE WHEN attempts >= max_attempts THEN NOW() END,
+            run_after = NOW() + make_interval(secs => LEAST(%s * POWER(2, attempts - 1), %s)),
+            last_error = %s,
+            worker_id = NULL,
+            lease_expires_at = NULL
+        WHERE id = %s AND worker_id = %s AND status = 'running'
+        RETURNING status
+    """, (JOB_RETRY_BASE_SECONDS, JOB_RETRY_MAX_SECONDS, error, job_id, worker_id))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def get_job(job_id, cursor):
+    """A job's state, without its credentials."""
+    cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM scrape_jobs WHERE id = %s", (job_id,))
+    row = cursor.fetchone()
+    return dict(zip(JOB_COLUMNS, row)) if row else None
+
+def queue_counts(cursor):
+    """Jobs per status, plus how many queued jobs are runnable now and how many leases have lapsed."""
+    cursor.execute("""
+        SELECT
+            COUNT(*) FILTER (WHERE status = 'queued'),
+            COUNT(*) FILTER (WHERE status = 'queued' AND run_after <= NOW()),
+            COUNT(*) FILTER (WHERE status = 'running'),
+            COUNT(*) FILTER (WHERE status = 'running' AND lease_expires_at < NOW()),
+            COUNT(*) FILTER (WHERE status = 'succeeded'),
+            COUNT(*) FILTER (WHERE status = 'failed'),
+            COUNT(DISTINCT worker_id) FILTER (WHERE status = 'running')
+        FROM scrape_jobs
+    """)
+    return dict(zip(("queued", "runnable", "running", "expired", "succeeded", "failed", "active_workers"), cursor.fetchone()))
+
+if __name__ == "__main__":
+    print(run_in_transaction(queue_counts))
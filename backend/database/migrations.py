@@ -0,0 +1,240 @@
+from backend.database.db_connection import get_db_connection
+
+# (version, description, statements). Append new migrations; never edit one that has shipped.
+MIGRATIONS = [
+    (1, "base tables", [
+        """CREATE TABLE IF NOT EXISTS students (
+            register_no VARCHAR(50) PRIMARY KEY,
+            name VARCHAR(255),
+            cgpa REAL,
+            course VARCHAR(255),
+            school VARCHAR(255),
+            course_duration VARCHAR(50)
+        )""",
+
+        """CREATE TABLE IF NOT EXISTS semesters (
+            exam_schedule_timetable_id INT,
+            semester_no INT,
+            register_no VARCHAR(50),
+            passing_year INT,
+            passing_month VARCHAR(20),
+            sgpa NUMERIC(4,2),
+            total_credits REAL,
+            earned_credits REAL,
+            obtained_marks REAL,
+            out_of_marks REAL,
+            result_status VARCHAR(50),
+            block_status BOOLEAN,
+            block_reason TEXT,
+            ordinance TEXT,
+            PRIMARY KEY (exam_schedule_timetable_id, semester_no, register_no),
+            FOREIGN KEY (register_no) REFERENCES students(register_no) ON DELETE CASCADE
+        )""",
+
+        """CREATE TABLE IF NOT EXISTS subjects (
+            exam_schedule_timetable_id INT,
+            subject_code VARCHAR(50),
+            semester_no INT,
+            register_no VARCHAR(50),
+            subject_name VARCHAR(255),
+            internal_marks REAL,
+            internal_passing_marks REAL,
+            max_internal_marks REAL,
+            external_marks REAL,
+            external_passing_marks REAL,
+            max_external_marks REAL,
+            grade VARCHAR(10),
+            grade_point REAL,
+            credits_obtained NUMERIC(3,2),
+            max_credits NUMERIC(3,2),
+            PRIMARY KEY (subject_code, semester_no, register_no, exam_schedule_timetable_id),
+            FOREIGN KEY (semester_no, register_no, exam_schedule_timetable_id) REFERENCES semesters(semester_no, register_no, exam_schedule_timetable_id) ON DELETE CASCADE
+        )""",
+    ]),
+
+    (2, "scrape state for incremental scraping", [
+        """CREATE TABLE IF NOT EXISTS scraped_exams (
+            exam_schedule_timetable_id INT,
+            semester_no INT,
+            register_no VARCHAR(50),
+            username VARCHAR(255),
+            result_declaration_date VARCHAR(50),
+            content_hash CHAR(64),
+            fetched_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (exam_schedule_timetable_id, semester_no, register_no),
+            FOREIGN KEY (semester_no, register_no, exam_schedule_timetable_id) REFERENCES semesters(semester_no, register_no, exam_schedule_timetable_id) ON DELETE CASCADE
+        )""",
+
+        """CREATE INDEX IF NOT EXISTS idx_scraped_exams_username ON scraped_exams(username)""",
+    ]),
+
+    (3, "indexes for API access paths", [
+        # Hand-applied indexes from query_history.md; the ones below supersede them
+        """DROP INDEX IF EXISTS idx_students_register_no""",
+        """DROP INDEX IF EXISTS idx_semesters_register_no""",
+        """DROP INDEX IF EXISTS idx_subjects_register_no""",
+
+        # /sgpa_progression: register_no lookup, already in the endpoint's ORDER BY, sgpa read from the index
+        """CREATE INDEX IF NOT EXISTS idx_semesters_progression
+           ON semesters (register_no, passing_year, passing_month, semester_no) INCLUDE (sgpa, result_status)""",
+
+        # /students subject subquery filters by register_no first, unlike the subjects primary key
+        """CREATE INDEX IF NOT EXISTS idx_subjects_register_semester
+           ON subjects (register_no, semester_no, exam_schedule_timetable_id)""",
+
+        # /students keyset sorts and filters; expressions match queries.SORT_EXPRESSIONS
+        """CREATE INDEX IF NOT EXISTS idx_students_name_keyset ON students ((COALESCE(name, '')), register_no)""",
+        """CREATE INDEX IF NOT EXISTS idx_students_cgpa_keyset ON students ((COALESCE(cgpa, -1)), register_no)""",
+        """CREATE INDEX IF NOT EXISTS idx_students_course_school ON students (course, school, register_no)""",
+        """CREATE INDEX IF NOT EXISTS idx_students_school ON students (school, register_no)""",
+    ]),
+
+    (4, "precomputed student analytics", [
+        # Latest attempt of every subject a student has sat, ranked within the student
+        """CREATE TABLE IF NOT EXISTS student_subject_results (
+            register_no VARCHAR(50) REFERENCES students(register_no) ON DELETE CASCADE,
+            subject_code VARCHAR(50),
+            subject_name VARCHAR(255),
+            semester_no INT,
+            exam_schedule_timetable_id INT,
+            attempts INT,
+            normalized_score REAL,
+            grade VARCHAR(10),
+            grade_point REAL,
+            student_rank INT,
+            cohort_percentile REAL,
+            PRIMARY KEY (register_no, subject_code)
+        )""",
+        """CREATE INDEX IF NOT EXISTS idx_student_subject_results_rank ON student_subject_results (register_no, student_rank)""",
+        """CREATE INDEX IF NOT EXISTS idx_student_subject_results_subject ON student_subject_results (subject_code)""",
+
+        # Chronological semester sittings per student; re-attempts of a semester are backlogs
+        """CREATE TABLE IF NOT EXISTS student_semester_order (
+            register_no VARCHAR(50) REFERENCES students(register_no) ON DELETE CASCADE,
+            exam_schedule_timetable_id INT,
+            semester_no INT,
+            sequence INT,
+            attempt_no INT,
+            is_backlog BOOLEAN,
+            passing_year INT,
+            passing_month VARCHAR(20),
+            sgpa NUMERIC(4,2),
+            result_status VARCHAR(50),
+            PRIMARY KEY (register_no, exam_schedule_timetable_id, semester_no)
+        )""",
+        """CREATE INDEX IF NOT EXISTS idx_student_semester_order_sequence ON student_semester_order (register_no, sequence)""",
+
+        """CREATE TABLE IF NOT EXISTS subject_cohort_stats (
+            subject_code VARCHAR(50) PRIMARY KEY,
+            subject_name VARCHAR(255),
+            students INT,
+            mean_score REAL,
+            p25 REAL,
+            p50 REAL,
+            p75 REAL,
+            p90 REAL,
+            pass_rate REAL,
+            grade_histogram JSONB,
+            score_histogram JSONB,
+            updated_at TIMESTAMP DEFAULT NOW()
+        )""",
+    ]),
+
+    (5, "dead-letter list of exams that could not be fetched", [
+        """CREATE TABLE IF NOT EXISTS failed_exams (
+            username VARCHAR(255),
+            exam_schedule_timetable_id INT,
+            semester_no INT,
+            exam JSONB,
+            error TEXT,
+            attempts INT DEFAULT 1,
+            first_failed_at TIMESTAMP DEFAULT NOW(),
+            last_failed_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (username, exam_schedule_timetable_id, semester_no)
+        )""",
+    ]),
+
+    (6, "scrape job queue shared by worker processes", [
+        """CREATE TABLE IF NOT EXISTS scrape_jobs (
+            id BIGSERIAL PRIMARY KEY,
+            username VARCHAR(255) NOT NULL,
+            credentials TEXT,
+            incremental BOOLEAN NOT NULL DEFAULT FALSE,
+            retry_failed BOOLEAN NOT NULL DEFAULT FALSE,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            attempts INT NOT NULL DEFAULT 0,
+            max_attempts INT NOT NULL DEFAULT 3,
+            run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+            worker_id VARCHAR(255),
+            lease_expires_at TIMESTAMP,
+            heartbeat_at TIMESTAMP,
+            last_error TEXT,
+            result JSONB,
+            created_at TIMESTAMP DEFAULT NOW(),
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )""",
+        # At most one queued or running job per account; enqueue_job coalesces onto it
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_scrape_jobs_active_username
+           ON scrape_jobs (username) WHERE status IN ('queued', 'running')""",
+        """CREATE INDEX IF NOT EXISTS idx_scrape_jobs_claim ON scrape_jobs (run_after, id) WHERE status = 'queued'""",
+        """CREATE INDEX IF NOT EXISTS idx_scrape_jobs_lease ON scrape_jobs (lease_expires_at) WHERE status = 'running'""",
+    ]),
+
+    (7, "trigram and full-text search indexes", [
+        """CREATE EXTENSION IF NOT EXISTS pg_trgm""",
+        # Expressions match queries.STUDENT_SEARCH_TEXT/_DOC and SUBJECT_SEARCH_TEXT/_DOC
+        """CREATE INDEX IF NOT EXISTS idx_students_search_trgm ON students USING gin (
+               (lower(register_no || ' ' || COALESCE(name, '') || ' ' || COALESCE(course, '') || ' ' || COALESCE(school, '')))
+               gin_trgm_ops)""",
+        """CREATE INDEX IF NOT EXISTS idx_students_search_fts ON students USING gin (
+               (to_tsvector('simple', register_no || ' ' || COALESCE(name, '') || ' ' || COALESCE(course, '') || ' ' || COALESCE(school, ''))))""",
+        # One row per subject, unlike subjects (one per student sitting)
+        """CREATE INDEX IF NOT EXISTS idx_subject_cohort_stats_search_trgm ON subject_cohort_stats USING gin (
+               (lower(subject_code || ' ' || COALESCE(subject_name, ''))) gin_trgm_ops)""",
+        """CREATE INDEX IF NOT EXISTS idx_subject_cohort_stats_search_fts ON subject_cohort_stats USING gin (
+               (to_tsvector('simple', subject_code || ' ' || COALESCE(subject_name, ''))))""",
+    ]),
+]
+
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def apply_migrations(conn=None):
+    """Apply every pending migration in order, each in its own transaction. Returns the versions applied."""
+    own_conn = conn is None
+    conn = get_db_connection() if own_conn else conn
+    applied = []
+    try:
+        for version, description, statements in MIGRATIONS:
+            with conn.cursor() as cursor:
+                # Serialise concurrent deployers; released at commit
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))")
+                if version in applied_versions(cursor):
+                    conn.commit()
+                    continue
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)", (version, description))
+            conn.commit()
+            applied.append(version)
+            print(f"✅ Applied migration {version}: {description}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            conn.close()
+    return applied
+
+if __name__ == "__main__":
+    applied = apply_migrations()
+    print(f"Schema up to date ({len(applied)} migrations applied).")
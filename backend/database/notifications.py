@@ -0,0 +1,14 @@
+# The API's response cache LISTENs on this channel; payload is a register_no, or "*" for everything
+STUDENT_CHANGES_CHANNEL = "student_data_changed"
+# Payload sent when cohort-wide figures (subject stats, percentiles) change for students who did not
+COHORT_CHANGED = "@cohort"
+
+def notify_student_changes(cursor, register_nos):
+    """Queue one NOTIFY per changed student; Postgres delivers them only when the transaction commits."""
+    cursor.execute(
+        "SELECT pg_notify(%s, register_no) FROM unnest(%s::text[]) AS register_no",
+        (STUDENT_CHANGES_CHANNEL, list(register_nos)),
+    )
+
+def notify_cohort_changes(cursor):
+    cursor.execute("SELECT pg_notify(%s, %s)", (STUDENT_CHANGES_CHANNEL, COHORT_CHANGED))
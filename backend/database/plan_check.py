@@ -0,0 +1,164 @@
+# EXPLAIN (ANALYZE, FORMAT JSON) every API query against a seeded throwaway Postgres and exit
+# non-zero on a sequential scan of a guarded table or a plan-cost regression against the baseline:
+#   PLAN_CHECK_DATABASE_URL=postgres://... python -m backend.database.plan_check --seed 20000
+# plan_baseline.json was recorded with BASELINE_STUDENTS seeded students; below that the tables are small
+# enough that sequential scans are the planner's right call. tests/test_plan_check.py runs the same check.
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+import asyncpg
+import psycopg2
+from backend.api.export import EXPORTS, build_export_query
+from backend.api.queries import (
+    build_students_query, SGPA_PROGRESSION_QUERY, TOP_SUBJECTS_QUERY, COMPARE_STUDENTS_QUERY,
+    COMPARE_SUBJECTS_QUERY, SUBJECT_DISTRIBUTION_QUERY, SEARCH_STUDENTS_QUERY, SEARCH_SUBJECTS_QUERY, search_args,
+)
+from backend.database.analytics import refresh_analytics, refresh_cohort_stats
+from backend.database.migrations import apply_migrations
+from backend.database.update_cgpa import CGPA_UPDATE_TEMPLATE
+from backend.lib.cohort_stats import SEMESTERS_COPY_QUERY, SUBJECTS_COPY_QUERY
+
+BASELINE_PATH = Path(__file__).with_name("plan_baseline.json")
+# Allowed growth in total plan cost before it counts as a regression
+COST_TOLERANCE = 0.25
+# ...and in absolute cost units, so single-row lookups costing a few units do not trip it on planner noise
+COST_SLACK = 10
+GUARDED_TABLES = {"students", "semesters", "subjects", "student_subject_results", "student_semester_order"}
+# Queries that read whole tables, or a fixed share of them, by design (unpaginated /students, /students/stream,
+# exports, the cohort stats COPY); their sequential scans are expected, so only their cost is checked
+FULL_READS = {
+    "students_all", "students_all_summary", "students_stream_by_cgpa", "cohort_subjects_copy", "cohort_semesters_copy",
+    *(f"export_{table}" for table in EXPORTS), "export_results_filter_course",
+}
+BASELINE_STUDENTS = 20000
+
+SEED_QUERIES = [
+    """INSERT INTO students (register_no, name, course, school, course_duration)
+       SELECT 'R' || lpad(i::text, 7, '0'), 'Student ' || i, 'Course ' || (i %% 12), 'School ' || (i %% 4), '2022-2025'
+       FROM generate_series(1, %(n)s) i
+       ON CONFLICT DO NOTHING""",
+    """INSERT INTO semesters (exam_schedule_timetable_id, semester_no, register_no, passing_year, passing_month, sgpa,
+                              total_credits, earned_credits, obtained_marks, out_of_marks, result_status, block_status)
+       SELECT 1000 + sem, sem, 'R' || lpad(i::text, 7, '0'), 2022 + sem / 2, CASE WHEN sem %% 2 = 0 THEN 'MAY' ELSE 'DEC' END,
+              round((5 + random() * 5)::numeric, 2), 22, 22, 450, 600,
+              CASE WHEN random() < 0.9 THEN 'Successful' ELSE 'Unsuccessful' END, false
+       FROM generate_series(1, %(n)s) i, generate_series(1, 6) sem
+       ON CONFLICT DO NOTHING""",
+    """INSERT INTO subjects (exam_schedule_timetable_id, subject_code, semester_no, register_no, subject_name,
+                             internal_marks, internal_passing_marks, max_internal_marks, external_marks,
+                             external_passing_marks, max_external_marks, grade, grade_point, credits_obtained, max_credits)
+       SELECT 1000 + sem, 'SUB' || sem || lpad(k::text, 2, '0'), sem, 'R' || lpad(i::text, 7, '0'), 'Subject ' || k,
+              round((random() * 50)::numeric), 20, 50, round((random() * 50)::numeric), 20, 50, 'A', 8, 4, 4
+       FROM generate_series(1, %(n)s) i, generate_series(1, 6) sem, generate_series(1, 6) k
+       ON CONFLICT DO NOTHING""",
+]
+
+def seed(dsn, students):
+    conn = psycopg2.connect(dsn)
+    try:
+        apply_migrations(conn)
+        with conn.cursor() as cursor:
+            for query in SEED_QUERIES:
+                cursor.execute(query, {"n": students})
+            cursor.execute(CGPA_UPDATE_TEMPLATE.format(where=""))
+            refresh_cohort_stats(cursor, refresh_analytics(cursor))
+            cursor.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"🌱 Seeded {students} students.")
+
+def api_queries(register_no):
+    """Every query the API issues, with representative arguments."""
+    cases = {
+        "students_first_page": build_students_query({}, limit=50),
+        "students_next_page": build_students_query({}, after=(register_no, register_no), limit=50),
+        "students_by_cgpa_summary": build_students_query({}, sort="cgpa", descending=True, limit=50, view="summary"),
+        "students_by_name_after": build_students_query({}, sort="name", after=("Student 5", register_no), limit=50, view="summary"),
+        "students_filter_course": build_students_query({"course": "Course 3"}, limit=50, view="summary"),
+        "sgpa_progression": (SGPA_PROGRESSION_QUERY, [register_no]),
+        "top_subjects": (TOP_SUBJECTS_QUERY.format(direction="ASC"), [register_no, 5]),
+        "compare_students": (COMPARE_STUDENTS_QUERY, [[register_no, "R0000001"]]),
+        "compare_subjects": (COMPARE_SUBJECTS_QUERY, [[register_no, "R0000001"]]),
+        "subject_distribution": (SUBJECT_DISTRIBUTION_QUERY, ["SUB101"]),
+        "search_students_prefix": (SEARCH_STUDENTS_QUERY, search_args("stud 12", 10)),
+        "search_students_typo": (SEARCH_STUDENTS_QUERY, search_args("studnet", 10)),
+        "search_subjects": (SEARCH_SUBJECTS_QUERY, search_args("subj", 10)),
+        # /students without limit, and /students/stream, which runs the same unpaginated query
+        "students_all": build_students_query({}),
+        "students_all_summary": build_students_query({}, view="summary"),
+        "students_stream_by_cgpa": build_students_query({}, sort="cgpa", descending=True, view="summary"),
+        "students_all_filter_course": build_students_query({"course": "Course 3"}, view="summary"),
+        "cohort_subjects_copy": (SUBJECTS_COPY_QUERY, []),
+        "cohort_semesters_copy": (SEMESTERS_COPY_QUERY, []),
+    }
+    for table in EXPORTS:
+        cases[f"export_{table}"] = build_export_query(table, {})[1:]
+    cases["export_results_filter_course"] = build_export_query("results", {"course": "Course 3"})[1:]
+    return cases
+
+def find_seq_scans(plan, found=None):
+    found = [] if found is None else found
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in GUARDED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        find_seq_scans(child, found)
+    return found
+
+async def explain_all(dsn):
+    conn = await asyncpg.connect(dsn)
+    try:
+        register_no = await conn.fetchval("SELECT register_no FROM students ORDER BY register_no OFFSET 10 LIMIT 1")
+        if register_no is None:
+            raise SystemExit("No students found; run with --seed first.")
+        results = {}
+        for name, (query, args) in api_queries(register_no).items():
+            raw = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}", *args)
+            plan = json.loads(raw)[0]
+            results[name] = {
+                "cost": plan["Plan"]["Total Cost"],
+                "ms": plan["Execution Time"],
+                "seq_scans": find_seq_scans(plan["Plan"]),
+            }
+        return results
+    finally:
+        await conn.close()
+
+def load_baseline():
+    return json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+
+def check(results, baseline):
+    failures = []
+    for name, result in results.items():
+        status = "ok"
+        if result["seq_scans"] and name not in FULL_READS:
+            status = f"seq scan on {', '.join(result['seq_scans'])}"
+        elif name in baseline and result["cost"] > max(baseline[name] * (1 + COST_TOLERANCE), baseline[name] + COST_SLACK):
+            status = f"cost {result['cost']:.1f} > baseline {baseline[name]:.1f}"
+        if status != "ok":
+            failures.append(name)
+        print(f"  {'✅' if status == 'ok' else '❌'} {name}: cost {result['cost']:.1f}, {result['ms']:.2f} ms — {status}")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail on sequential scans or plan-cost regressions in API queries.")
+    parser.add_argument("--dsn", default=os.getenv("PLAN_CHECK_DATABASE_URL"), help="throwaway database to check against")
+    parser.add_argument("--seed", type=int, help="insert this many synthetic students first")
+    parser.add_argument("--update-baseline", action="store_true", help="record current costs as the new baseline")
+    args = parser.parse_args()
+    if not args.dsn:
+        sys.exit("Set PLAN_CHECK_DATABASE_URL or pass --dsn (never point this at production).")
+
+    if args.seed:
+        seed(args.dsn, args.seed)
+    results = asyncio.run(explain_all(args.dsn))
+    failures = check(results, load_baseline())
+
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps({name: r["cost"] for name, r in results.items()}, indent=2) + "\n")
+        print(f"📝 Baseline written to {BASELINE_PATH}")
+    if failures:
+        sys.exit(f"{len(failures)} query plan check(s) failed.")
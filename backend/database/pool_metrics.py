@@ -0,0 +1,43 @@
+import threading
+
+class PoolMetrics:
+    """Counters shared by the psycopg2 and asyncpg pools: connections in use, callers waiting and acquire latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+        self.acquire_count = 0
+        self.acquire_seconds_total = 0.0
+        self.acquire_seconds_max = 0.0
+
+    def start_wait(self):
+        with self._lock:
+            self.waiting += 1
+
+    def acquired(self, seconds):
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.acquire_count += 1
+            self.acquire_seconds_total += seconds
+            self.acquire_seconds_max = max(self.acquire_seconds_max, seconds)
+
+    def wait_failed(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def released(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self):
+        with self._lock:
+            avg = self.acquire_seconds_total / self.acquire_count if self.acquire_count else 0.0
+            return {
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "acquire_count": self.acquire_count,
+                "acquire_avg_ms": round(avg * 1000, 3),
+                "acquire_max_ms": round(self.acquire_seconds_max * 1000, 3),
+            }
@@ -0,0 +1,72 @@
+import hashlib
+import json
+from psycopg2.extras import Json, execute_values
+
+def payload_hash(results):
+    """Stable content hash of a result payload, independent of key order."""
+    return hashlib.sha256(json.dumps(results, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+def get_known_exams(username, cursor):
+    """Returns {(exam_schedule_timetable_id, semester_no): (result_declaration_date, content_hash)} already stored for an account."""
+    cursor.execute("""
+        SELECT exam_schedule_timetable_id, semester_no, result_declaration_date, content_hash
+        FROM scraped_exams
+        WHERE username = %s
+    """, (username,))
+    return {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+
+def record_exam(username, register_no, exam_schedule_timetable_id, semester_no, result_declaration_date, content_hash, cursor):
+    """Remember which payload was stored for an exam so later runs can skip it."""
+    cursor.execute("""
+        INSERT INTO scraped_exams (exam_schedule_timetable_id, semester_no, register_no, username,
+                                   result_declaration_date, content_hash, fetched_at)
+        VALUES (%s, %s, %s, %s, %s, %s, NOW())
+        ON CONFLICT (exam_schedule_timetable_id, semester_no, register_no) DO UPDATE
+        SET username = EXCLUDED.username,
+            result_declaration_date = EXCLUDED.result_declaration_date,
+            content_hash = EXCLUDED.content_hash,
+            fetched_at = EXCLUDED.fetched_at;
+    """, (exam_schedule_timetable_id, semester_no, register_no, username, result_declaration_date, content_hash))
+
+def update_failed_exams(username, failed, succeeded, cursor):
+    """Dead-letter `failed` ((exam_schedule_timetable_id, semester_no, exam, error) tuples) and
+    clear the (exam_schedule_timetable_id, semester_no) keys in `succeeded`."""
+    if succeeded:
+        cursor.execute("""
+            DELETE FROM failed_exams
+            WHERE username = %s AND (exam_schedule_timetable_id, semester_no) IN %s
+        """, (username, tuple(succeeded)))
+    if failed:
+        execute_values(cursor, """
+            INSERT INTO failed_exams (username, exam_schedule_timetable_id, semester_no, exam, error)
+            VALUES %s
+            ON CONFLICT (username, exam_schedule_timetable_id, semester_no) DO UPDATE
+            SET exam = EXCLUDED.exam,
+                error = EXCLUDED.error,
+                attempts = failed_exams.attempts + 1,
+                last_failed_at = NOW()
+        """, [(username, timetable_id, semester_no, Json(exam), error) for timetable_id, semester_no, exam, error in failed])
+
+def clear_failed_exams(keys, cursor):
+    """Drop the dead letters for (username, exam_schedule_timetable_id, semester_no) keys that have since been
+    fetched. flush_buffer calls this in the transaction that stores their rows."""
+    if keys:
+        execute_values(cursor, """
+            DELETE FROM failed_exams f
+            USING (VALUES %s) AS k (username, exam_schedule_timetable_id, semester_no)
+            WHERE f.username = k.username
+              AND f.exam_schedule_timetable_id = k.exam_schedule_timetable_id
+              AND f.semester_no = k.semester_no
+        """, keys)
+
+def get_failed_exams(username, cursor):
+    """Returns {(exam_schedule_timetable_id, semester_no): attempts} dead-lettered for an account."""
+    cursor.execute("""
+        SELECT exam_schedule_timetable_id, semester_no, attempts
+        FROM failed_exams
+        WHERE username = %s
+    """, (username,))
+    return {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+if __name__ == "__main__":
+    get_known_exams()
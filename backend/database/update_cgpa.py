@@ -1,29 +1,86 @@
+import os
+from backend.lib.telemetry import span
+
+# "batch": the ingest path recomputes CGPA once per flush; "trigger": Postgres keeps it current itself
+CGPA_MODE = os.getenv("CGPA_MODE", "batch")
+
+# A student's CGPA is the credit-weighted SGPA of successful semesters, and only
+# defined once every semester they have sat is successful.
+CGPA_UPDATE_TEMPLATE = """
+    UPDATE students s
+    SET cgpa = c.cgpa
+    FROM (
+        SELECT st.register_no,
+               CASE
+                   WHEN COUNT(DISTINCT sem.semester_no)
+                        = COUNT(DISTINCT sem.semester_no) FILTER (WHERE sem.result_status = 'Successful')
+                   THEN SUM(sem.sgpa * sem.earned_credits) FILTER (WHERE sem.result_status = 'Successful')
+                        / NULLIF(SUM(sem.earned_credits) FILTER (WHERE sem.result_status = 'Successful'), 0)
+                   ELSE NULL
+               END AS cgpa
+        FROM students st
+        LEFT JOIN semesters sem ON sem.register_no = st.register_no
+        {where}
+        GROUP BY st.register_no
+    ) c
+    WHERE s.register_no = c.register_no
+      AND s.cgpa IS DISTINCT FROM c.cgpa
+"""
+
+def recompute_cgpa(cursor, register_nos=None):
+    """Recompute CGPA for the given register numbers, or for every student when register_nos is None, in one statement."""
+    if register_nos is None:
+        with span("cgpa_recompute", students="all"):
+            cursor.execute(CGPA_UPDATE_TEMPLATE.format(where=""))
+    else:
+        register_nos = list(register_nos)
+        if not register_nos:
+            return 0
+        with span("cgpa_recompute", students=len(register_nos)):
+            cursor.execute(CGPA_UPDATE_TEMPLATE.format(where="WHERE st.register_no = ANY(%s)"), (register_nos,))
+    return cursor.rowcount
+
 def calculate_and_update_cgpa(register_no, cursor):
-    cursor.execute("""
-        WITH SuccessfulSemesters AS (
-            SELECT DISTINCT semester_no
-            FROM semesters
-            WHERE register_no = %s AND result_status = 'Successful'
-        ),
-        AllSemesters AS (
-            SELECT DISTINCT semester_no
-            FROM semesters
-            WHERE register_no = %s
-        ),
-        ComputedCGPA AS (
-            SELECT CASE
-                WHEN (SELECT COUNT(*) FROM AllSemesters) = (SELECT COUNT(*) FROM SuccessfulSemesters)
-                THEN (SELECT SUM(sgpa * earned_credits) / SUM(earned_credits)
-                      FROM semesters
-                      WHERE register_no = %s AND result_status = 'Successful')
-                ELSE NULL
-            END AS CGPA
-        )
-        UPDATE students
-        SET cgpa = (SELECT CGPA FROM ComputedCGPA)
-        WHERE register_no = %s;
-    """, (register_no, register_no, register_no, register_no))
+    recompute_cgpa(cursor, [register_no])
+
+def install_cgpa_trigger(cursor):
+    """Keep students.cgpa current automatically with statement-level triggers on semesters."""
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION refresh_cgpa_for_changed_semesters() RETURNS trigger AS $$
+        BEGIN
+            {CGPA_UPDATE_TEMPLATE.format(where="WHERE st.register_no IN (SELECT DISTINCT register_no FROM changed_rows)")};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    for event, transition in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        name = f"semesters_cgpa_{event.lower()}"
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name} ON semesters")
+        cursor.execute(f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON semesters
+            REFERENCING {transition} TABLE AS changed_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION refresh_cgpa_for_changed_semesters()
+        """)
+
+def drop_cgpa_trigger(cursor):
+    for event in ("insert", "update", "delete"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS semesters_cgpa_{event} ON semesters")
+    cursor.execute("DROP FUNCTION IF EXISTS refresh_cgpa_for_changed_semesters()")
 
 # Runs only when the script is run directly and not when it is imported
 if __name__ == "__main__":
-    calculate_and_update_cgpa()
+    import sys
+    from backend.database.db_connection import get_db_connection
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            if "--install-trigger" in sys.argv:
+                install_cgpa_trigger(cursor)
+                print("✅ CGPA triggers installed.")
+            elif "--drop-trigger" in sys.argv:
+                drop_cgpa_trigger(cursor)
+                print("✅ CGPA triggers dropped.")
+            else:
+                print(f"✅ Recomputed CGPA for {recompute_cgpa(cursor)} students.")
+        conn.commit()
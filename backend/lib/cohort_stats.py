@@ -0,0 +1,123 @@
+import asyncio
+import io
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+SUBJECTS_COPY_QUERY = """
+    SELECT register_no, subject_code, subject_name, exam_schedule_timetable_id, internal_marks, external_marks,
+           max_internal_marks, max_external_marks, grade, grade_point
+    FROM subjects
+"""
+SEMESTERS_COPY_QUERY = """
+    SELECT register_no, exam_schedule_timetable_id, semester_no, sgpa
+    FROM semesters
+"""
+
+async def load_frame(conn, query):
+    """Bulk-load a query with COPY and parse it column-wise with Arrow, not row by row."""
+    buf = io.BytesIO()
+    await conn.copy_from_query(query, output=buf, format="csv", header=True)
+    buf.seek(0)
+    # Identifiers stay text even when a column happens to look numeric
+    text_columns = {name: pa.string() for name in ("register_no", "subject_code", "subject_name", "grade")}
+    return pa_csv.read_csv(buf, convert_options=pa_csv.ConvertOptions(column_types=text_columns)).to_pandas()
+
+def latest_attempts(subjects):
+    """Keep only the most recent sitting of each (student, subject); earlier ones are backlog attempts."""
+    subjects = subjects.sort_values("exam_schedule_timetable_id", kind="stable")
+    return subjects.drop_duplicates(["register_no", "subject_code"], keep="last")
+
+def normalized_scores(subjects):
+    marks = subjects["internal_marks"].fillna(0) + subjects["external_marks"].fillna(0)
+    max_marks = subjects["max_internal_marks"].fillna(0) + subjects["max_external_marks"].fillna(0)
+    return (marks / max_marks.replace(0, np.nan)).astype("float64")
+
+def sgpa_trends(semesters):
+    """Least-squares SGPA slope per student over their sittings in chronological order, all at once."""
+    semesters = semesters.dropna(subset=["sgpa"]).sort_values(["register_no", "exam_schedule_timetable_id"])
+    x = semesters.groupby("register_no").cumcount().astype("float64")
+    y = semesters["sgpa"].astype("float64")
+    sums = pd.DataFrame({"register_no": semesters["register_no"], "x": x, "y": y, "xx": x * x, "xy": x * y})
+    g = sums.groupby("register_no").agg(n=("x", "size"), sx=("x", "sum"), sy=("y", "sum"), sxx=("xx", "sum"), sxy=("xy", "sum"))
+    denominator = g["n"] * g["sxx"] - g["sx"] ** 2
+    slope = (g["n"] * g["sxy"] - g["sx"] * g["sy"]) / denominator.replace(0, np.nan)
+    trend = pd.DataFrame({
+        "sittings": g["n"],
+        "slope": slope,
+        "first_sgpa": semesters.groupby("register_no")["sgpa"].first().astype("float64"),
+        "latest_sgpa": semesters.groupby("register_no")["sgpa"].last().astype("float64"),
+    })
+    return trend.reset_index()
+
+def compute_cohort_stats(subjects, semesters):
+    """Ranks, percentiles, grade histograms, pass rates and SGPA trends for the whole cohort."""
+    latest = latest_attempts(subjects)
+    latest = latest.assign(score=normalized_scores(latest), passed=latest["grade_point"].fillna(0) > 0)
+    latest = latest.assign(
+        percentile=latest.groupby("subject_code")["score"].rank(pct=True),
+        subject_rank=latest.groupby("subject_code")["score"].rank(ascending=False, method="min"),
+    )
+
+    by_subject = latest.groupby("subject_code")
+    summary = by_subject.agg(
+        subject_name=("subject_name", "first"),
+        students=("register_no", "size"),
+        mean_score=("score", "mean"),
+        pass_rate=("passed", "mean"),
+    )
+    quantiles = by_subject["score"].quantile([0.25, 0.5, 0.75, 0.9]).unstack().reindex(columns=[0.25, 0.5, 0.75, 0.9])
+    quantiles.columns = ["p25", "p50", "p75", "p90"]
+    summary = summary.join(quantiles)
+
+    histogram = latest.assign(grade=latest["grade"].fillna("N/A")).groupby(["subject_code", "grade"]).size()
+    grade_histograms = {
+        code: {grade: int(n) for grade, n in counts.droplevel(0).items()} for code, counts in histogram.groupby(level=0)
+    }
+
+    return {
+        "subjects": summary.reset_index(),
+        "grade_histograms": grade_histograms,
+        "student_subjects": latest[["register_no", "subject_code", "score", "percentile", "subject_rank", "grade"]],
+        "sgpa_trends": sgpa_trends(semesters),
+    }
+
+def records(frame):
+    """DataFrame rows as plain dicts with NaN turned into None for JSON."""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+class CohortStatsCache:
+    """Holds the last computed stats; marked stale when the scraper reports new data and recomputed on next use."""
+
+    def __init__(self):
+        self.stats = None
+        self.generated_at = None
+        self.compute_ms = None
+        self.stale = True
+        self._lock = asyncio.Lock()
+
+    def mark_stale(self, _payload=None):
+        self.stale = True
+
+    async def get(self, acquire):
+        async with self._lock:
+            if self.stale or self.stats is None:
+                # Clear first so changes arriving mid-refresh trigger another one; a failed refresh restores it
+                self.stale = False
+                try:
+                    async with acquire() as conn:
+                        subjects = await load_frame(conn, SUBJECTS_COPY_QUERY)
+                        semesters = await load_frame(conn, SEMESTERS_COPY_QUERY)
+                    started = time.perf_counter()
+                    stats = await asyncio.to_thread(compute_cohort_stats, subjects, semesters)
+                except BaseException:
+                    self.stale = True
+                    raise
+                self.stats = stats
+                self.compute_ms = round((time.perf_counter() - started) * 1000, 2)
+                self.generated_at = time.time()
+            return self.stats
+
+cohort_stats = CohortStatsCache()
@@ -0,0 +1,19 @@
+import json
+import os
+
+# Prefix of machine-readable progress lines on the fetcher's stdout; the API job runner parses them
+PROGRESS_PREFIX = "@@progress "
+
+def report_progress(event, **fields):
+    """Emit a structured progress event when running under the API job runner (SCRAPER_PROGRESS=1)."""
+    if os.getenv("SCRAPER_PROGRESS") == "1":
+        print(PROGRESS_PREFIX + json.dumps({"event": event, **fields}, default=str), flush=True)
+
+def parse_progress(line):
+    """Returns the event dict for a progress line, or None for ordinary output."""
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(PROGRESS_PREFIX):])
+    except ValueError:
+        return None
@@ -0,0 +1,185 @@
+"""Typed records for ERP payloads.
+
+Each record class declares its fields once as (column, payload key, converter). When the class is
+defined that table is compiled into a single parse function, so parsing a payload is one call with
+no per-field loop or dtype dispatch, and it emits a tuple in table column order, ready for COPY."""
+
+def to_text(value):
+    """Stripped string; '-' (the ERP's blank) and None become None."""
+    if type(value) is str:
+        value = value.strip()
+        return None if value == "-" else value
+    return None if value is None else str(value)
+
+def to_int(value):
+    """int for integral numbers or numeric strings; anything else, including '2.5' and '-', is None."""
+    if type(value) is float:
+        return int(value) if value.is_integer() else None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def compile_parser(fields, name):
+    """Build `parse(payload) -> tuple` with one converter call per field written out inline."""
+    namespace = {}
+    converters = {}
+    items = []
+    for column, key, convert in fields:
+        converters[f"_{column}"] = convert
+        items.append(f"_{column}(get({key!r}))")
+    source = f"def {name}(payload):\n    get = payload.get\n    return ({', '.join(items)},)\n"
+    exec(compile(source, f"<record {name}>", "exec"), converters, namespace)
+    return namespace[name]
+
+class Record:
+    """Base for ERP records. Subclasses set FIELDS and __slots__ = columns(FIELDS)."""
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.parse_row = staticmethod(compile_parser(cls.FIELDS, f"parse_{cls.__name__}"))
+
+    def __init__(self, *values):
+        for slot, value in zip(self.__slots__, values):
+            setattr(self, slot, value)
+
+    @staticmethod
+    def parse_row(payload):
+        """Convert one payload dict straight to a tuple in field order (compiled per subclass)."""
+        return ()
+
+    @classmethod
+    def from_json(cls, payload):
+        return cls(*cls.parse_row(payload))
+
+    def as_row(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{s}={getattr(self, s)!r}' for s in self.__slots__)})"
+
+def columns(fields):
+    return tuple(column for column, _, _ in fields)
+
+class Exam(Record):
+    FIELDS = (
+        ("exam_schedule_timetable_id", "examScheduleTimetableId", to_int),
+        ("semester_no", "semesterId", to_int),
+        ("exam_schedule_id", "examScheduleId", to_int),
+        ("university_syllabus_id", "universitySyllabusId", to_int),
+        ("result_declaration_date", "resultDeclarationDate", to_text),
+    )
+    __slots__ = columns(FIELDS)
+
+class Student(Record):
+    """Student details repeated on every subject row of a result payload; taken from the first."""
+    FIELDS = (
+        ("register_no", "seatNo", to_text),
+        ("name", "studentName", to_text),
+        ("course", "programName", to_text),
+        ("school", "instituteName", to_text),
+        ("course_duration", "academicyear", to_text),
+    )
+    __slots__ = columns(FIELDS)
+
+class SemesterResult(Record):
+    """Semester totals from a result payload; the semesters row is the exam's key columns followed by these."""
+    FIELDS = (
+        ("register_no", "seatNo", to_text),
+        ("passing_year", "passingYear", to_int),
+        ("passing_month", "passingMonth", to_text),
+        ("sgpa", "sgpa", to_float),
+        ("total_credits", "sgpaCreditPointTotal", to_float),
+        ("earned_credits", "sgpaEarnedPointsTotal", to_float),
+        ("obtained_marks", "sgpaObtainedMarks", to_float),
+        ("out_of_marks", "outOff", to_float),
+        ("result_status", "resultStatus", to_text),
+        ("block_status", "resultBlockStatus", to_text),
+        ("block_reason", "resultBlockReason", to_text),
+        ("ordinance", "ordinance", to_text),
+    )
+    __slots__ = columns(FIELDS)
+
+class SubjectResult(Record):
+    FIELDS = (
+        ("subject_code", "subjectCode", to_text),
+        ("subject_name", "subjectName", to_text),
+        ("internal_marks", "InternalMarks", to_float),
+        ("internal_passing_marks", "intPassing", to_float),
+        ("max_internal_marks", "int", to_float),
+        ("external_marks", "ExternalMarks", to_float),
+        ("external_passing_marks", "extPassing", to_float),
+        ("max_external_marks", "ext", to_float),
+        ("grade", "Grade", to_text),
+        ("grade_point", "Pointer", to_float),
+        ("credits_obtained", "earnedCredit", to_float),
+        ("max_credits", "creditPoint", to_float),
+    )
+    __slots__ = columns(FIELDS)
+
+# Table columns in COPY order; the parse functions below emit tuples in exactly this order
+STUDENT_COLUMNS = Student.__slots__
+SEMESTER_COLUMNS = ("exam_schedule_timetable_id", "semester_no") + SemesterResult.__slots__
+SUBJECT_COLUMNS = ("exam_schedule_timetable_id", "subject_code", "semester_no", "register_no") + SubjectResult.__slots__[1:]
+
+def exam_key(exam):
+    """(exam_schedule_timetable_id, semester_no) of a schedule entry."""
+    return to_int(exam.get("examScheduleTimetableId")), to_int(exam.get("semesterId"))
+
+def parse_results(exam, results):
+    """One pass over an exam's result payload. Returns (student row, semester row, subject rows)."""
+    timetable_id, semester_no = exam_key(exam)
+    first = results[0]
+    student = Student.parse_row(first)
+    semester = (timetable_id, semester_no) + SemesterResult.parse_row(first)
+    key = (timetable_id, semester_no, semester[2])
+    subject_parse = SubjectResult.parse_row
+    # subject_code sits between the timetable id and the semester in the table, hence the reshuffle
+    subjects = [(key[0], row[0], key[1], key[2]) + row[1:] for row in map(subject_parse, results)]
+    return student, semester, subjects
+
+if __name__ == "__main__":
+    # Microbenchmark: parsed rows/sec for the per-field clean_value path and for parse_results
+    import time
+    from backend.lib.utils import clean_value
+    from backend.scraper.mock_erp import MockConfig, exam_schedule, student_results
+
+    config = MockConfig(semesters=8, subjects=8)
+    payloads = [(exam, student_results(i, exam["semesterId"], config)) for i in range(500) for exam in exam_schedule(config)]
+    rows = sum(len(results) + 2 for _, results in payloads)
+
+    def legacy(exam, results):
+        """The per-field path the insert_* helpers take."""
+        student = results[0]
+        timetable_id = clean_value(str(exam.get("examScheduleTimetableId")), int)
+        semester_no = clean_value(str(exam.get("semesterId")), int)
+        register_no = clean_value(student["seatNo"])
+        student_row = tuple(clean_value(student[k]) for k in ("seatNo", "studentName", "programName", "instituteName", "academicyear"))
+        semester_row = (timetable_id, semester_no) + tuple(
+            clean_value(student[k]) for k in ("seatNo", "passingYear", "passingMonth", "sgpa", "sgpaCreditPointTotal",
+                                              "sgpaEarnedPointsTotal", "sgpaObtainedMarks", "outOff", "resultStatus",
+                                              "resultBlockStatus")
+        )
+        subject_rows = [
+            (timetable_id, clean_value(sub["subjectCode"]), semester_no, register_no) + tuple(
+                clean_value(sub[k]) for k in ("subjectName", "InternalMarks", "intPassing", "int", "ExternalMarks",
+                                              "extPassing", "ext", "Grade", "Pointer", "earnedCredit", "creditPoint")
+            )
+            for sub in results
+        ]
+        return student_row, semester_row, subject_rows
+
+    for name, parse in (("clean_value", legacy), ("parse_results", parse_results)):
+        started = time.perf_counter()
+        for exam, results in payloads:
+            parse(exam, results)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>14}: {rows / elapsed:>12,.0f} rows/sec ({elapsed * 1000:.1f} ms for {rows} rows)")
@@ -0,0 +1,172 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from backend.lib.progress import report_progress
+
+# "json" for one JSON object per log line, "text" for plain messages
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Correlates every span and log line of one scrape; set from SCRAPE_JOB_ID in fetcher subprocesses
+current_job_id = contextvars.ContextVar("current_job_id", default=None)
+
+LOGIN_SECONDS = Histogram(
+    "scraper_login_seconds", "Time to obtain a logged-in ERP session", ["method"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40),
+)
+ERP_FETCH_SECONDS = Histogram(
+    "scraper_erp_fetch_seconds", "Latency of one ERP GET attempt", ["endpoint", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20),
+)
+INGEST_BATCH_SECONDS = Histogram(
+    "ingest_batch_seconds", "Time to COPY and merge one ingest batch, including CGPA and analytics",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+INGEST_ROWS = Counter("ingest_rows_total", "Rows bulk-loaded into the database")
+CGPA_RECOMPUTE_SECONDS = Histogram(
+    "cgpa_recompute_seconds", "Time for one grouped CGPA recompute",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+API_REQUEST_SECONDS = Histogram(
+    "api_request_seconds", "API handler latency", ["route", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+API_QUERY_SECONDS = Histogram(
+    "api_query_seconds", "Latency of SQL statements issued by the API", ["statement"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+# span name -> (histogram, its label names)
+SPAN_HISTOGRAMS = {
+    "login": (LOGIN_SECONDS, ("method",)),
+    "erp_fetch": (ERP_FETCH_SECONDS, ("endpoint", "outcome")),
+    "ingest_batch": (INGEST_BATCH_SECONDS, ()),
+    "cgpa_recompute": (CGPA_RECOMPUTE_SECONDS, ()),
+}
+# Spans too frequent to log or report one event each; they still feed their histogram, and their
+# totals are reported in one span_totals event by report_quiet_spans
+QUIET_SPANS = {"erp_fetch"}
+_quiet_totals = {}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with the job id and any `extra` fields attached."""
+
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        job_id = current_job_id.get()
+        if job_id:
+            entry["job_id"] = job_id
+        entry.update({k: v for k, v in vars(record).items() if k not in self.RESERVED})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging():
+    """Install the root handler once per process (stderr, so fetcher stdout stays for progress lines)."""
+    root = logging.getLogger()
+    if getattr(root, "_telemetry_configured", False):
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    # httpx logs every request at INFO; ERP fetches are already covered by the erp_fetch histogram
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    root._telemetry_configured = True
+
+def bind_job(job_id=None):
+    """Tag everything that follows in this context (and tasks/threads started from it) with a job id."""
+    job_id = job_id or os.getenv("SCRAPE_JOB_ID") or uuid.uuid4().hex
+    current_job_id.set(job_id)
+    return job_id
+
+def observe_span(name, seconds, labels):
+    histogram, label_names = SPAN_HISTOGRAMS.get(name, (None, ()))
+    if histogram is None:
+        return
+    if label_names:
+        histogram = histogram.labels(*(str(labels.get(label, "")) for label in label_names))
+    histogram.observe(seconds)
+    if name == "ingest_batch" and labels.get("outcome") != "error":
+        INGEST_ROWS.inc(labels.get("rows", 0))
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block: feeds its histogram, logs it with the job id and, under the API job runner,
+    reports it so the API process records it too. Add attributes to the yielded dict as you learn them."""
+    started = time.perf_counter()
+    attrs = dict(attrs)
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs.setdefault("outcome", "error")
+        attrs.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        observe_span(name, seconds, attrs)
+        if name in QUIET_SPANS:
+            totals = _quiet_totals.setdefault(name, {"count": 0, "seconds": 0.0})
+            totals["count"] += 1
+            totals["seconds"] += seconds
+        else:
+            logging.getLogger("span").info(name, extra={"span": name, "duration_ms": round(seconds * 1000, 2), **attrs})
+            report_progress("span", span=name, seconds=round(seconds, 4), **attrs)
+
+def report_quiet_spans():
+    """Report the count and total seconds of each quiet span since the last call, one event per span name."""
+    for name, totals in _quiet_totals.items():
+        report_progress("span_totals", span=name, count=totals["count"], seconds=round(totals["seconds"], 4))
+    _quiet_totals.clear()
+
+_FIRST_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+def statement_label(query):
+    """Low-cardinality label for a SQL statement: its first keyword and first table, e.g. "SELECT students"."""
+    verb = query.split(None, 1)[0].upper() if query.strip() else ""
+    match = _FIRST_TABLE.search(query)
+    return f"{verb} {match.group(1)}" if match else verb
+
+def observe_query(record):
+    """asyncpg query logger callback."""
+    API_QUERY_SECONDS.labels(statement_label(record.query)).observe(record.elapsed)
+
+class SnapshotCollector:
+    """Exposes each numeric value of a stats dict (pool stats, cache stats, ...) as a gauge at scrape time."""
+
+    def __init__(self, prefix, snapshot):
+        self.prefix = prefix
+        self.snapshot = snapshot
+
+    def collect(self):
+        for key, value in self.snapshot().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield GaugeMetricFamily(f"{self.prefix}_{key}", f"{self.prefix} {key.replace('_', ' ')}", value=value)
+
+_snapshot_collectors = {}
+
+def register_snapshot(prefix, snapshot):
+    """Register a snapshot collector, replacing any earlier one under the same prefix (a reimported
+    module would otherwise make prometheus_client raise "Duplicated timeseries")."""
+    previous = _snapshot_collectors.pop(prefix, None)
+    if previous is not None:
+        REGISTRY.unregister(previous)
+    collector = SnapshotCollector(prefix, snapshot)
+    REGISTRY.register(collector)
+    _snapshot_collectors[prefix] = collector
@@ -0,0 +1,79 @@
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+from backend.database.scrape_state import payload_hash
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+# Root of the raw-payload archive; set SCRAPER_ARCHIVE_DIR to an empty string to turn archiving off
+ARCHIVE_DIR = os.getenv("SCRAPER_ARCHIVE_DIR", ".archive")
+
+class PayloadArchive:
+    """Content-addressed store of raw ERP JSON payloads plus an append-only index of scrapes.
+
+    Each payload is stored once under objects/<hash[:2]>/<hash>.json.zst (or .json.gz without
+    zstandard), keyed by the same hash as scraped_exams.content_hash. index.jsonl gets one line
+    per scrape naming the schedule payload and the result payload of every exam fetched."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+
+    def _paths(self, digest):
+        folder = self.objects / digest[:2]
+        return folder / f"{digest}.json.zst", folder / f"{digest}.json.gz"
+
+    def put(self, payload):
+        """Store a payload unless an identical one is already archived; returns its hash."""
+        digest = payload_hash(payload)
+        zst_path, gz_path = self._paths(digest)
+        if zst_path.exists() or gz_path.exists():
+            return digest
+        data = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+        if zstandard is not None:
+            path, blob = zst_path, zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            path, blob = gz_path, gzip.compress(data, compresslevel=9)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a concurrent reader never sees half a blob
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+        return digest
+
+    def get(self, digest):
+        zst_path, gz_path = self._paths(digest)
+        if zst_path.exists():
+            if zstandard is None:
+                raise RuntimeError(f"{zst_path} needs the zstandard package to read")
+            return json.loads(zstandard.ZstdDecompressor().decompress(zst_path.read_bytes()))
+        return json.loads(gzip.decompress(gz_path.read_bytes()))
+
+    def record_scrape(self, username, schedule_hash, result_hashes):
+        """Append one scrape to the index. result_hashes maps "timetableId:semesterId" to a payload hash."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        line = json.dumps({
+            "username": username, "fetched_at": time.time(), "schedule": schedule_hash, "results": result_hashes,
+        }) + "\n"
+        # One write in append mode keeps concurrent scrapers from interleaving lines
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def scrapes(self):
+        if not self.index_path.exists():
+            return []
+        with open(self.index_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+def exam_archive_key(exam):
+    return f"{exam.get('examScheduleTimetableId')}:{exam.get('semesterId')}"
+
+def get_archive():
+    """The configured archive, or None when archiving is turned off."""
+    return PayloadArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from playwright.async_api import async_playwright
+from backend.scraper.getting_cookies import LOGIN_URL, login_in_context
+from backend.scraper.fetcher import scrape_account
+from backend.scraper.http_client import FetchStats, HostRateLimiter
+from backend.database.bulk_ingest import IngestBuffer, flush_buffer
+from backend.database.db_connection import pool_metrics
+from backend.scraper.session_cache import get_cached_or_http_session, remember_session
+from backend.lib.telemetry import bind_job, configure_logging, span
+
+# Logins (cached-session probes, HTTP form logins and browser contexts) in flight at once
+LOGIN_CONCURRENCY = int(os.getenv("BATCH_LOGIN_CONCURRENCY", "4"))
+# HTTP fetch workers consuming logged-in sessions
+FETCH_WORKERS = int(os.getenv("BATCH_FETCH_WORKERS", "8"))
+# Buffered exams that trigger a bulk load mid-batch
+FLUSH_EVERY = int(os.getenv("BATCH_FLUSH_EVERY", "500"))
+
+logger = logging.getLogger(__name__)
+
+def load_credentials(path):
+    """Read (username, password) pairs from a CSV with a header row or from a JSONL file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    return [(row["username"], row["password"]) for row in rows]
+
+async def run_batch(credentials, login_concurrency=LOGIN_CONCURRENCY, fetch_workers=FETCH_WORKERS, incremental=False,
+                    retry_failed=False, fetch_stats=None, ingest_stats=None):
+    """Log every account in through one shared headless browser and scrape them with a worker pool.
+
+    fetch_stats (a FetchStats) and ingest_stats ({"rows", "seconds"}) can be passed in to read the totals afterwards."""
+    started = time.perf_counter()
+    reports = {
+        username: {"username": username, "status": "pending", "login_s": None, "fetch_s": None, "exams": 0,
+                   "failed_exams": 0, "error": None}
+        for username, _ in credentials
+    }
+    fetch_stats = fetch_stats if fetch_stats is not None else FetchStats()
+    sessions = asyncio.Queue(maxsize=fetch_workers * 2)
+    login_slots = asyncio.Semaphore(login_concurrency)
+    # Login requests bypass ScrapeClient, so they get their own limiter at the same per-host rate
+    login_limiter = HostRateLimiter()
+    buffer = IngestBuffer()
+    flush_lock = asyncio.Lock()
+    ingest_stats = ingest_stats if ingest_stats is not None else {"rows": 0, "seconds": 0.0}
+
+    async def flush(force=False):
+        """Bulk-load what is buffered. Never raises: when the load fails, every account with rows in
+        the failed batch is reported as ingest_failed, since its rows were rolled back."""
+        if not force and len(buffer) < FLUSH_EVERY:
+            return
+        async with flush_lock:
+            taken = buffer.take()
+            if not len(taken):
+                return
+            try:
+                stats = await asyncio.to_thread(flush_buffer, taken, incremental)
+            except Exception as e:
+                logger.exception("Bulk load failed")
+                for username in taken.usernames():
+                    reports[username].update(status="ingest_failed", error=f"Bulk load failed: {e}")
+                return
+            ingest_stats["rows"] += stats["rows"]
+            ingest_stats["seconds"] += stats["seconds"]
+
+    async def quick_login(username, password):
+        """Cached session or HTTP login; returns True when the browser is not needed."""
+        async with login_slots:
+            await login_limiter.wait(LOGIN_URL)
+            t0 = time.perf_counter()
+            cookies = await asyncio.to_thread(get_cached_or_http_session, username, password)
+            login_s = round(time.perf_counter() - t0, 3)
+        if not cookies:
+            return False
+        reports[username]["login_s"] = login_s
+        await sessions.put((username, cookies))
+        return True
+
+    async def browser_login(browser, username, password):
+        report = reports[username]
+        async with login_slots:
+            await login_limiter.wait(LOGIN_URL)
+            t0 = time.perf_counter()
+            try:
+                with span("login", method="browser"):
+                    cookies = await login_in_context(browser, username, password)
+            except Exception as e:
+                report.update(status="login_failed", error=str(e))
+                return
+            finally:
+                report["login_s"] = round(time.perf_counter() - t0, 3)
+        remember_session(username, cookies)
+        await sessions.put((username, cookies))
+
+    async def fetch_worker():
+        while (item := await sessions.get()) is not None:
+            username, cookies = item
+            report = reports[username]
+            t0 = time.perf_counter()
+            try:
+                result = await scrape_account(cookies, username, incremental, buffer, fetch_stats, retry_failed)
+            except Exception as e:
+                report.update(status="fetch_failed", error=str(e))
+                continue
+            finally:
+                report["fetch_s"] = round(time.perf_counter() - t0, 3)
+            report.update(status="ok", exams=result["exams"], failed_exams=result["failed"])
+            # Outside the try: a failed bulk load is an ingest failure of every account in it, not a fetch failure
+            await flush()
+
+    workers = [asyncio.create_task(fetch_worker()) for _ in range(fetch_workers)]
+    try:
+        quick = await asyncio.gather(*(quick_login(username, password) for username, password in credentials))
+        needs_browser = [cred for cred, done in zip(credentials, quick) if not done]
+
+        # Only pay for Chromium when some accounts have no reusable session
+        if needs_browser:
+            print(f"🟡 Starting shared headless browser for {len(needs_browser)} accounts...")
+            async with async_playwright() as pw:
+                browser = await pw.chromium.launch(headless=True)
+                try:
+                    await asyncio.gather(*(browser_login(browser, username, password) for username, password in needs_browser))
+                finally:
+                    await browser.close()
+    finally:
+        for _ in workers:
+            await sessions.put(None)
+        await asyncio.gather(*workers)
+        # flush() does not raise, so the report below is printed even when the batch itself failed
+        await flush(force=True)
+        print_report(list(reports.values()), time.perf_counter() - started)
+
+    if ingest_stats["seconds"]:
+        print(f"📥 Ingested {ingest_stats['rows']} rows at {ingest_stats['rows'] / ingest_stats['seconds']:.1f} rows/sec")
+    print(f"📈 Requests: {fetch_stats.summary()}")
+    print(f"🔌 DB pool: {pool_metrics.snapshot()}")
+    return list(reports.values())
+
+def print_report(reports, elapsed):
+    ok = [r for r in reports if r["status"] == "ok"]
+    failed = [r for r in reports if r["status"] != "ok"]
+    print(f"\n{'='*50}")
+    print(f"📊 Batch finished in {elapsed:.2f}s — {len(ok)} ok, {len(failed)} failed, "
+          f"{sum(r['failed_exams'] for r in reports)} exams dead-lettered")
+    if elapsed > 0:
+        print(f"⚡ Throughput: {len(ok) / elapsed * 60:.1f} accounts/min")
+    for r in reports:
+        print(f"  {r['username']}: {r['status']} | login {r['login_s']}s | fetch {r['fetch_s']}s | exams {r['exams']}"
+              + (f" | gave up on {r['failed_exams']}" if r["failed_exams"] else "")
+              + (f" | {r['error']}" if r["error"] else ""))
+    print(f"{'='*50}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape many accounts with one shared browser.")
+    parser.add_argument("credentials", help="CSV (username,password header) or JSONL file")
+    parser.add_argument("--logins", type=int, default=LOGIN_CONCURRENCY, help="logins (HTTP or browser) at once")
+    parser.add_argument("--workers", type=int, default=FETCH_WORKERS, help="HTTP fetch workers")
+    parser.add_argument("--incremental", action="store_true", help="only fetch new or re-declared exams")
+    parser.add_argument("--retry-failed", action="store_true", help="only refetch dead-lettered exams")
+    parser.add_argument("--report", help="write the per-account report as JSON to this path")
+    args = parser.parse_args()
+
+    configure_logging()
+    bind_job()
+    results = asyncio.run(run_batch(
+        load_credentials(args.credentials), args.logins, args.workers, args.incremental, args.retry_failed
+    ))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -1,83 +1,128 @@
-from backend.database.update_cgpa import calculate_and_update_cgpa
-from backend.scraper.getting_cookies import login_and_get_cookies
-from backend.scraper.getting_exam_schedule import fetch_exam_schedules
-from backend.scraper.getting_results import fetch_results
-from backend.database.db_connection import get_db_connection
-from backend.lib.utils import clean_value
-from backend.database.insert_student import insert_student
-from backend.database.insert_semester import insert_semester
-from backend.database.insert_subject import insert_subject
+import asyncio
+import time
+from backend.scraper.session_cache import get_session_cookies
+from backend.scraper.getting_exam_schedule import fetch_exam_schedules_async
+from backend.scraper.getting_results import fetch_all_results
+from backend.scraper.http_client import FetchStats, ScrapeClient
+from backend.scraper.archive import exam_archive_key, get_archive
+from backend.database.db_connection import pooled_connection
+from backend.lib.records import exam_key, to_text
+from backend.lib.progress import report_progress
+from backend.lib.telemetry import bind_job, configure_logging, report_quiet_spans
+from backend.database.scrape_state import get_failed_exams, get_known_exams, payload_hash, update_failed_exams
+from backend.database.bulk_ingest import IngestBuffer, flush_buffer
 
-def main(username: str, password: str):
-    print("\n🚀 Starting Script...")
-    cookies = login_and_get_cookies(username, password)
-
-    print("\n📊 Retrieving exam schedules...")
-    exam_schedules = fetch_exam_schedules(cookies)
+def load_known_exams(username):
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            return get_known_exams(username, cursor)
 
-    for exam in exam_schedules:
-        print(f"\n{'='*50}")
-        print(f"📚 Semester: {exam['semesterName']} | Exam: {exam['ExamName']}")
-        print(f"📅 Result Declaration Date [YYYY/MM/DD]: {exam['resultDeclarationDate']}")
-        print(f"{'='*50}")
+def load_failed_exams(username):
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            return get_failed_exams(username, cursor)
 
-        results = fetch_results(cookies, exam['examScheduleId'], exam['semesterId'], exam['universitySyllabusId'])
+def save_failed_exams(username, failed):
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            update_failed_exams(username, failed, [], cursor)
+        conn.commit()
 
-        if results:
-            with get_db_connection() as conn:
-                try:
-                    with conn.cursor() as cursor:
-                        student = results[0]
-                        
-                        # Extract values once
-                        seat_no = clean_value(student.get('seatNo'))
-                        semester_no = clean_value(exam.get('semesterId'), int)
-                        examScheduleTimetableId = clean_value(exam.get('examScheduleTimetableId', int))
+async def scrape_account(cookies, username=None, incremental=False, buffer=None, stats=None, retry_failed=False):
+    """Fetch every exam schedule and its results over one pooled client, buffering results as they arrive.
 
-                        # Insert student record first
-                        insert_student(student, cursor)
+    In incremental mode only exams that are new, or whose resultDeclarationDate changed since the
+    last run for this username, are fetched, and rows are only rewritten when the payload changed.
+    Exams that still fail after retries are dead-lettered in failed_exams; retry_failed fetches only those.
+    Without a caller-supplied buffer the results are bulk-loaded as soon as the account is done.
+    Returns {"exams": fetched, "failed": given up}."""
+    started = time.perf_counter()
+    known = await asyncio.to_thread(load_known_exams, username) if incremental and username else {}
+    dead_letters = await asyncio.to_thread(load_failed_exams, username) if retry_failed and username else {}
+    own_buffer = buffer is None
+    buffer = IngestBuffer() if own_buffer else buffer
+    stats = stats if stats is not None else FetchStats()
+    failed = []
+    succeeded = []
+    archive = get_archive()
+    archived = {}
+    async with ScrapeClient(cookies, stats=stats) as client:
+        print("\n📊 Retrieving exam schedules...")
+        exam_schedules = await fetch_exam_schedules_async(client)
+        schedule_hash = archive.put(exam_schedules) if archive else None
 
-                        # Insert Semesters Data
-                        insert_semester(student, exam, cursor)
+        if retry_failed:
+            to_fetch = [exam for exam in exam_schedules if exam_key(exam) in dead_letters]
+            print(f"🔁 Retrying {len(to_fetch)} dead-lettered exams")
+        else:
+            to_fetch = [
+                exam for exam in exam_schedules
+                # Declaration dates are stored with to_text, so compare them the same way
+                if exam_key(exam) not in known or known[exam_key(exam)][0] != to_text(exam.get('resultDeclarationDate'))
+            ]
+        if incremental:
+            print(f"⏭️ Skipping {len(exam_schedules) - len(to_fetch)} unchanged exams, fetching {len(to_fetch)}")
+        report_progress("exams_found", total=len(exam_schedules), to_fetch=len(to_fetch))
+        fetched = 0
 
-                        # Batch Insert for Subjects
-                        subject_data = [
-                            (
-                                examScheduleTimetableId,
-                                clean_value(sub.get('subjectCode')),
-                                semester_no,
-                                seat_no,
-                                clean_value(sub.get('subjectName')),
-                                clean_value(sub.get('InternalMarks'), float),
-                                clean_value(sub.get('intPassing'), float),
-                                clean_value(sub.get('int'), float),
-                                clean_value(sub.get('ExternalMarks'), float),
-                                clean_value(sub.get('extPassing'), float),
-                                clean_value(sub.get('ext'), float),
-                                clean_value(sub.get('Grade')),
-                                clean_value(sub.get('Pointer'), float),
-                                clean_value(sub.get('earnedCredit'), float),
-                                clean_value(sub.get('creditPoint'), float)
-                            ) for sub in results
-                        ]
-                        insert_subject(subject_data, cursor)
+        async for exam, results in fetch_all_results(client, to_fetch, failed):
+            print(f"\n{'='*50}")
+            print(f"📚 Semester: {exam['semesterName']} | Exam: {exam['ExamName']}")
+            print(f"📅 Result Declaration Date [YYYY/MM/DD]: {exam['resultDeclarationDate']}")
+            print(f"{'='*50}")
+            fetched += 1
+            succeeded.append(exam_key(exam))
+            if archive:
+                archived[exam_archive_key(exam)] = archive.put(results)
+            report_progress("exam_fetched", n=fetched, m=len(to_fetch), semester=exam.get('semesterName'))
 
-                        # Ensure CGPA calculation is part of the same transaction
-                        calculate_and_update_cgpa(seat_no, cursor)
+            if not results:
+                continue
+            previous = known.get(exam_key(exam))
+            unchanged = previous is not None and previous[1] == payload_hash(results)
+            if unchanged:
+                print("⏭️ Payload unchanged, nothing to write.")
+            buffer.add(exam, results, username, record_only=unchanged)
 
-                        # Commit only once after all operations succeed
-                        conn.commit()
-                        print(f"✅ Successfully inserted data for Semester {semester_no}")
+    print(f"\n⏱️ Fetched {fetched} of {len(exam_schedules)} exams in {time.perf_counter() - started:.2f}s")
+    if archive:
+        archive.record_scrape(username, schedule_hash, archived)
+    if failed:
+        print(f"🪦 Gave up on {len(failed)} exams; rerun with --retry-failed to fetch them again")
+    if username and failed:
+        await asyncio.to_thread(save_failed_exams, username, [(*exam_key(exam), exam, error) for exam, error in failed])
+    if username:
+        # Cleared by flush_buffer only once these exams' rows are committed
+        buffer.recovered_exams.extend((username, *key) for key in succeeded)
+    if own_buffer:
+        ingest = await asyncio.to_thread(flush_buffer, buffer, incremental)
+        report_progress("rows_inserted", **ingest)
+        summary = stats.summary()
+        print(f"📈 Requests: {summary}")
+        report_progress("fetch_summary", failed_exams=len(failed), **summary)
+    return {"exams": fetched, "failed": len(failed)}
 
-                except Exception as e:
-                    conn.rollback()  # Rollback if anything fails
-                    print(f"❌ Error inserting data: {e}")
-                    print("🚨 Transaction rolled back. No changes committed.")
+def main(username: str, password: str, incremental: bool = False, retry_failed: bool = False):
+    print("\n🚀 Starting Script...")
+    cookies = get_session_cookies(username, password)
+    report_progress("login_done")
+    try:
+        asyncio.run(scrape_account(cookies, username, incremental, retry_failed=retry_failed))
+    finally:
+        report_quiet_spans()
 
 
 # Runs only when the script is run directly and not when it is imported
 if __name__ == "__main__":
     import os
+    import sys
     from dotenv import load_dotenv
     load_dotenv()
-    main(os.getenv('CMR_USERNAME'), os.getenv('CMR_PASSWORD'))
+    configure_logging()
+    bind_job()
+    main(
+        os.getenv('CMR_USERNAME'),
+        os.getenv('CMR_PASSWORD'),
+        incremental="--incremental" in sys.argv,
+        retry_failed="--retry-failed" in sys.argv,
+    )
@@ -1,13 +1,13 @@
 from playwright.sync_api import sync_playwright
+from backend.scraper.http_client import BASE_URL
 
-BASE_URL = "https://erp.cmr.edu.in"
 LOGIN_URL = f"{BASE_URL}/login.htm"
 
-def login_and_get_cookies(username: str, password: str):
+def login_and_get_cookies(username: str, password: str, headless: bool = False):
     """Log in using Playwright and retrieve session cookies."""
     print("🟡 Starting Playwright browser...")  
     with sync_playwright() as pw:
-        browser = pw.chromium.launch(headless=False)  
+        browser = pw.chromium.launch(headless=headless)  
         page = browser.new_page()
 
         print(f"🔄 Navigating to login page: {LOGIN_URL}")
@@ -33,6 +33,23 @@ def login_and_get_cookies(username: str, password: str):
 
         browser.close()
         return cookie_dict
+
+async def login_in_context(browser, username: str, password: str):
+    """Log in inside a fresh, isolated context of an already running browser and return its cookies."""
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await page.goto(LOGIN_URL)
+
+        await page.fill('input[name="j_username"]', username)
+        await page.fill('input[name="j_password"]', password)
+        await page.click('button[type="submit"]')
+        await page.wait_for_load_state("networkidle")
+
+        cookies = await context.cookies()
+        return {cookie['name']: cookie['value'] for cookie in cookies}
+    finally:
+        await context.close()
     
 if __name__ == "__main__":
     login_and_get_cookies("username", "password")
\ No newline at end of file
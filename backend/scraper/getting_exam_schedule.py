@@ -1,24 +1,20 @@
-import requests
+from backend.scraper.http_client import BASE_URL, FetchError
 
-BASE_URL = "https://erp.cmr.edu.in"
 SCHEDULE_URL = f"{BASE_URL}/getExamScheduleStudentSide.json"
 
-def fetch_exam_schedules(cookies):
-    """Fetch all exam schedules using session cookies."""
+async def fetch_exam_schedules_async(client):
+    """Fetch all exam schedules over a shared ScrapeClient."""
     print("🔄 Fetching exam schedules...")
-    session = requests.Session()
-    session.cookies.update(cookies)
-
-    response = session.get(SCHEDULE_URL)
+    response = await client.get(SCHEDULE_URL)
     print(f"📡 API Response Status: {response.status_code}")
 
-    if response.status_code == 200:
-        schedules = response.json()
-        print(f"✅ Exam schedules retrieved! Total Semesters: {len(schedules)}")
-        return schedules
-    else:
+    # Without the schedule there is nothing to fetch, so fail the scrape rather than report zero exams
+    if response.status_code != 200:
         print("❌ Failed to fetch exam schedules.")
-        return []
-    
-if __name__ == "__main__":
-    fetch_exam_schedules()
\ No newline at end of file
+        raise FetchError(f"HTTP {response.status_code} for exam schedules")
+    try:
+        schedules = response.json()
+    except ValueError:
+        raise FetchError("Non-JSON response for exam schedules")
+    print(f"✅ Exam schedules retrieved! Total Semesters: {len(schedules)}")
+    return schedules
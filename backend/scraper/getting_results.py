@@ -1,26 +1,44 @@
-import requests
+import asyncio
+import httpx
+from backend.scraper.http_client import BASE_URL, FetchError
 
-BASE_URL = "https://erp.cmr.edu.in"
 RESULT_URL_TEMPLATE = f"{BASE_URL}/getStudentSideResultForCMR.json?examScheduleId={{}}&examSemesterId={{}}&universitySyllabusId={{}}"
 
-def fetch_results(cookies, examScheduleId, semesterId, universitySyllabusId):
-    """Fetch results dynamically for each exam schedule."""
+async def fetch_results_async(client, examScheduleId, semesterId, universitySyllabusId):
+    """Fetch results for one exam schedule over a shared ScrapeClient."""
     result_url = RESULT_URL_TEMPLATE.format(examScheduleId, semesterId, universitySyllabusId)
     print(f"🔄 Fetching results from: {result_url}")
 
-    session = requests.Session()
-    session.cookies.update(cookies)
-
-    response = session.get(result_url)
+    response = await client.get(result_url)
     print(f"📡 API Response Status for Semester {semesterId}: {response.status_code}")
 
-    if response.status_code == 200:
+    if response.status_code != 200:
+        raise FetchError(f"HTTP {response.status_code} for semester {semesterId}")
+    try:
         results = response.json()
-        print(f"✅ Results retrieved! Subjects: {len(results)}")
-        return results
-    else:
-        print(f"⚠️ Failed to fetch results for Semester {semesterId}.")
-        return []
-    
-if __name__ == "__main__":
-    fetch_results()
\ No newline at end of file
+    except ValueError:
+        # An expired session gets the login page back with a 200
+        raise FetchError(f"Non-JSON response for semester {semesterId}")
+    print(f"✅ Results retrieved! Subjects: {len(results)}")
+    return results
+
+async def fetch_all_results(client, exams, failed=None):
+    """Fetch results for every exam concurrently, yielding (exam, results) as each one completes.
+
+    When a `failed` list is given, exams that still fail after retries are appended to it as
+    (exam, error) instead of aborting the whole scrape."""
+    async def fetch_one(exam):
+        try:
+            results = await fetch_results_async(client, exam['examScheduleId'], exam['semesterId'], exam['universitySyllabusId'])
+        except (httpx.HTTPError, FetchError) as e:
+            if failed is None:
+                raise
+            print(f"⚠️ Giving up on semester {exam.get('semesterId')}: {e}")
+            failed.append((exam, str(e) or type(e).__name__))
+            return exam, None
+        return exam, results
+
+    for next_done in asyncio.as_completed([fetch_one(exam) for exam in exams]):
+        exam, results = await next_done
+        if results is not None:
+            yield exam, results
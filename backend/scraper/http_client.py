@@ -0,0 +1,238 @@
+import asyncio
+import os
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import httpx
+from backend.lib.telemetry import span
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+# Point at a local stand-in (backend.scraper.mock_erp) for development and benchmarks
+BASE_URL = os.getenv("ERP_BASE_URL", "https://erp.cmr.edu.in").rstrip("/")
+# Upper bound on in-flight ERP requests for a single scrape
+MAX_CONCURRENCY = int(os.getenv("SCRAPER_MAX_CONCURRENCY", "8"))
+# Requests per second allowed against any one host
+RATE_LIMIT_PER_HOST = float(os.getenv("SCRAPER_RATE_LIMIT_PER_HOST", "10"))
+# Seconds to establish a connection / to wait for a response before giving up on an attempt
+CONNECT_TIMEOUT = float(os.getenv("SCRAPER_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("SCRAPER_READ_TIMEOUT", "20"))
+# Attempts per GET, including the first; waits between them are jittered and grow exponentially
+MAX_ATTEMPTS = int(os.getenv("SCRAPER_MAX_ATTEMPTS", "4"))
+RETRY_MAX_WAIT = float(os.getenv("SCRAPER_RETRY_MAX_WAIT", "30"))
+# Consecutive failures that open a host's circuit, and how long it stays open before a probe
+BREAKER_THRESHOLD = int(os.getenv("SCRAPER_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("SCRAPER_BREAKER_COOLDOWN", "30"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """A GET that did not produce usable data. retry_after, when set, is how long the server asked us to wait."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RetryableStatus(FetchError):
+    pass
+
+
+class CircuitOpenError(FetchError):
+    pass
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Per-host breaker: after enough consecutive failures the host is left alone for a cooldown,
+    then a single probe request decides whether it closes again."""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.opens = 0
+        self._failures = {}
+        self._opened_at = {}
+        self._probing = set()
+
+    def check(self, host):
+        """Returns 0 when a request may go ahead, otherwise seconds until it is worth trying again."""
+        opened_at = self._opened_at.get(host)
+        if opened_at is None:
+            return 0.0
+        remaining = opened_at + self.cooldown - time.monotonic()
+        if remaining <= 0 and host not in self._probing:
+            self._probing.add(host)
+            return 0.0
+        return max(remaining, 1.0)
+
+    def is_probing(self, host):
+        return host in self._probing
+
+    def end_probe(self, host):
+        """Release a probe that ended without a verdict (cancelled, or an error that says nothing about the host),
+        so the next request can probe again instead of the host staying rejected."""
+        self._probing.discard(host)
+
+    def record_success(self, host):
+        self._failures.pop(host, None)
+        self._opened_at.pop(host, None)
+        self._probing.discard(host)
+
+    def record_failure(self, host):
+        failures = self._failures.get(host, 0) + 1
+        self._failures[host] = failures
+        # A failed probe reopens straight away
+        if host in self._probing or (failures >= self.threshold and host not in self._opened_at):
+            self.opens += 1
+            self._opened_at[host] = time.monotonic()
+        self._probing.discard(host)
+
+
+class FetchStats:
+    """Latency and retry counters for one run, shared by every client that reports into it."""
+
+    def __init__(self):
+        self.latencies = []
+        self.requests = 0
+        self.retries = 0
+        self.gave_up = 0
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+        }
+
+
+# Shared by every client in the process so concurrent scrapes agree on whether the ERP is healthy
+host_breaker = CircuitBreaker()
+
+
+def retry_wait(retry_state):
+    """Honour Retry-After (or the breaker's cooldown) when we have one, else back off with jitter."""
+    retry_after = getattr(retry_state.outcome.exception(), "retry_after", None)
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_WAIT)
+    return wait_random_exponential(multiplier=0.5, max=RETRY_MAX_WAIT)(retry_state)
+
+
+class HostRateLimiter:
+    """Spaces out request start times per host so we never exceed the configured rate."""
+
+    def __init__(self, rate_per_second=RATE_LIMIT_PER_HOST):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(str(url)).hostname
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ScrapeClient:
+    """A pooled keep-alive httpx client shared by every request in one scrape.
+
+    GETs time out, are retried on transport errors, 429 and 5xx, and are refused outright while the
+    host's circuit is open. Any other response is returned to the caller as is."""
+
+    def __init__(self, cookies, max_concurrency=MAX_CONCURRENCY, rate_per_host=RATE_LIMIT_PER_HOST,
+                 stats=None, breaker=None, max_attempts=MAX_ATTEMPTS):
+        self.client = httpx.AsyncClient(
+            cookies=cookies,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = HostRateLimiter(rate_per_host)
+        self.stats = stats if stats is not None else FetchStats()
+        self.breaker = breaker if breaker is not None else host_breaker
+        self.max_attempts = max_attempts
+
+    async def _attempt(self, url, **kwargs):
+        host = urlparse(str(url)).hostname
+        wait = self.breaker.check(host)
+        if wait:
+            raise CircuitOpenError(f"circuit open for {host}", retry_after=wait)
+        probe = self.breaker.is_probing(host)
+        try:
+            async with self.semaphore:
+                await self.rate_limiter.wait(url)
+                self.stats.requests += 1
+                started = time.perf_counter()
+                with span("erp_fetch", endpoint=urlparse(str(url)).path.rsplit("/", 1)[-1]) as attrs:
+                    try:
+                        response = await self.client.get(url, **kwargs)
+                    except httpx.TransportError:
+                        self.breaker.record_failure(host)
+                        raise
+                    finally:
+                        self.stats.latencies.append(time.perf_counter() - started)
+                    attrs["outcome"] = str(response.status_code)
+            if response.status_code in RETRYABLE_STATUSES:
+                self.breaker.record_failure(host)
+                raise RetryableStatus(
+                    f"HTTP {response.status_code} from {host}",
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                )
+            self.breaker.record_success(host)
+            return response
+        finally:
+            if probe:
+                self.breaker.end_probe(host)
+
+    async def get(self, url, **kwargs):
+        def count_retry(_retry_state):
+            self.stats.retries += 1
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=retry_wait,
+            retry=retry_if_exception_type((httpx.TransportError, FetchError)),
+            before_sleep=count_retry,
+            reraise=True,
+        )
+        try:
+            return await retrying(self._attempt, url, **kwargs)
+        except (httpx.TransportError, FetchError):
+            self.stats.gave_up += 1
+            raise
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,210 @@
+# A local stand-in for erp.cmr.edu.in serving a synthetic cohort, for development and benchmarks:
+#   python -m backend.scraper.mock_erp --students 1000 --latency-ms 40 --error-rate 0.02
+#   ERP_BASE_URL=http://127.0.0.1:8900 python -m backend.scraper.fetcher
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import time
+from urllib.parse import parse_qs
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+
+SESSION_COOKIE = "JSESSIONID"
+GRADES = [(10, "O"), (9, "A+"), (8, "A"), (7, "B+"), (6, "B"), (5, "C"), (4, "P"), (0, "F")]
+
+LOGIN_PAGE = """<html><body>
+<form method="post" action="j_spring_security_check">
+  <input type="text" name="j_username"><input type="password" name="j_password">
+  <button type="submit">Login</button>
+</form>
+</body></html>"""
+
+MOCK_ERP_STUDENTS = int(os.getenv("MOCK_ERP_STUDENTS", "1000"))
+MOCK_ERP_SEMESTERS = int(os.getenv("MOCK_ERP_SEMESTERS", "6"))
+MOCK_ERP_SUBJECTS = int(os.getenv("MOCK_ERP_SUBJECTS", "6"))
+# Mean added latency per JSON request; each request gets between half and one and a half times this
+MOCK_ERP_LATENCY_MS = float(os.getenv("MOCK_ERP_LATENCY_MS", "0"))
+# Fraction of JSON requests answered with 503 and Retry-After
+MOCK_ERP_ERROR_RATE = float(os.getenv("MOCK_ERP_ERROR_RATE", "0"))
+# Sessions older than this get the login page back instead of JSON, like the real ERP
+MOCK_ERP_SESSION_TTL = float(os.getenv("MOCK_ERP_SESSION_TTL", "1800"))
+MOCK_ERP_PASSWORD = os.getenv("MOCK_ERP_PASSWORD", "password")
+
+class MockConfig:
+    def __init__(self, students=MOCK_ERP_STUDENTS, semesters=MOCK_ERP_SEMESTERS, subjects=MOCK_ERP_SUBJECTS,
+                 latency_ms=MOCK_ERP_LATENCY_MS, error_rate=MOCK_ERP_ERROR_RATE, session_ttl=MOCK_ERP_SESSION_TTL,
+                 password=MOCK_ERP_PASSWORD, seed=0):
+        self.students = students
+        self.semesters = semesters
+        self.subjects = subjects
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.password = password
+        self.seed = seed
+
+def mock_username(i):
+    return f"student{i:06d}"
+
+def mock_register_no(i):
+    return f"MOCK{i:06d}"
+
+def student_index(username, config):
+    if not username.startswith("student") or not username[7:].isdigit():
+        return None
+    i = int(username[7:])
+    return i if 0 <= i < config.students else None
+
+def exam_schedule(config):
+    return [
+        {
+            "examScheduleTimetableId": 5000 + sem,
+            "examScheduleId": 7000 + sem,
+            "semesterId": sem,
+            "universitySyllabusId": 1,
+            "semesterName": f"Semester {sem}",
+            "ExamName": f"End Semester Examination {2020 + (sem + 1) // 2}",
+            "resultDeclarationDate": f"{2020 + (sem + 1) // 2}/{'07' if sem % 2 else '01'}/15",
+        }
+        for sem in range(1, config.semesters + 1)
+    ]
+
+def student_results(i, sem, config):
+    """The result payload for one student and semester, the same on every call for a given seed."""
+    rng = random.Random(f"{config.seed}:{i}:{sem}")
+    year = 2020 + (sem + 1) // 2
+    subjects = []
+    for k in range(1, config.subjects + 1):
+        internal = rng.randint(10, 50)
+        external = rng.randint(10, 50)
+        pointer = next(p for p, _ in GRADES if p <= (internal + external) / 10)
+        subjects.append({
+            "subjectCode": f"MCK{sem}{k:02d}",
+            "subjectName": f"Mock Subject {sem}.{k}",
+            "InternalMarks": str(internal),
+            "intPassing": "20",
+            "int": "50",
+            "ExternalMarks": str(external),
+            "extPassing": "20",
+            "ext": "50",
+            "Grade": dict(GRADES)[pointer],
+            "Pointer": str(pointer),
+            "earnedCredit": "4.00" if pointer else "0.00",
+            "creditPoint": "4.00",
+        })
+    earned = sum(4 for s in subjects if s["Pointer"] != "0")
+    sgpa = sum(int(s["Pointer"]) * 4 for s in subjects) / (4 * len(subjects))
+    student = {
+        "seatNo": mock_register_no(i),
+        "studentName": f"Mock Student {i}",
+        "programName": f"B.Tech Course {i % 12}",
+        "instituteName": f"School {i % 4}",
+        "academicyear": "2020-2024",
+        "passingYear": str(year),
+        "passingMonth": "JUL" if sem % 2 else "JAN",
+        "sgpa": f"{sgpa:.2f}",
+        "sgpaCreditPointTotal": str(4 * len(subjects)),
+        "sgpaEarnedPointsTotal": str(earned),
+        "sgpaObtainedMarks": str(sum(int(s["InternalMarks"]) + int(s["ExternalMarks"]) for s in subjects)),
+        "outOff": str(100 * len(subjects)),
+        "resultStatus": "Successful" if earned == 4 * len(subjects) else "Unsuccessful",
+        "resultBlockStatus": "false",
+        "resultBlockReason": None,
+        "ordinance": None,
+    }
+    return [{**student, **subject} for subject in subjects]
+
+def create_app(config=None):
+    config = config or MockConfig()
+    app = FastAPI()
+    sessions = {}
+    stats = {"logins": 0, "json_requests": 0, "errors_injected": 0, "expired": 0, "started_at": time.time()}
+
+    def session_student(request):
+        session = sessions.get(request.cookies.get(SESSION_COOKIE))
+        if session is None:
+            return None
+        i, created = session
+        if time.time() - created > config.session_ttl:
+            stats["expired"] += 1
+            return None
+        return i
+
+    async def degrade():
+        """Injected latency and failures; returns an error response or None."""
+        stats["json_requests"] += 1
+        if config.latency_ms:
+            await asyncio.sleep(config.latency_ms * random.uniform(0.5, 1.5) / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            stats["errors_injected"] += 1
+            return JSONResponse({"error": "Service Unavailable"}, status_code=503, headers={"Retry-After": "1"})
+        return None
+
+    @app.get("/login.htm", response_class=HTMLResponse)
+    async def login_page():
+        return LOGIN_PAGE
+
+    @app.post("/j_spring_security_check")
+    async def login(request: Request):
+        # Parsed by hand so the mock needs nothing beyond what the API already depends on
+        form = {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+        i = student_index(form.get("j_username", ""), config)
+        if i is None or form.get("j_password") != config.password:
+            return RedirectResponse("/login.htm?error=true", status_code=302)
+        stats["logins"] += 1
+        token = secrets.token_hex(16)
+        sessions[token] = (i, time.time())
+        response = RedirectResponse("/home.htm", status_code=302)
+        response.set_cookie(SESSION_COOKIE, token, httponly=True)
+        return response
+
+    @app.get("/home.htm", response_class=HTMLResponse)
+    async def home():
+        return "<html><body>Welcome</body></html>"
+
+    @app.get("/getExamScheduleStudentSide.json")
+    async def schedule(request: Request):
+        error = await degrade()
+        if error:
+            return error
+        if session_student(request) is None:
+            return HTMLResponse(LOGIN_PAGE)
+        return exam_schedule(config)
+
+    @app.get("/getStudentSideResultForCMR.json")
+    async def results(request: Request, examScheduleId: int, examSemesterId: int, universitySyllabusId: int):
+        error = await degrade()
+        if error:
+            return error
+        i = session_student(request)
+        if i is None:
+            return HTMLResponse(LOGIN_PAGE)
+        if not 1 <= examSemesterId <= config.semesters or examScheduleId != 7000 + examSemesterId:
+            return []
+        return student_results(i, examSemesterId, config)
+
+    @app.get("/__mock/stats")
+    async def mock_stats():
+        elapsed = time.time() - stats["started_at"]
+        return {**stats, "sessions": len(sessions), "json_requests_per_sec": round(stats["json_requests"] / elapsed, 1)}
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a synthetic ERP for local scraping.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--students", type=int, default=MOCK_ERP_STUDENTS)
+    parser.add_argument("--latency-ms", type=float, default=MOCK_ERP_LATENCY_MS)
+    parser.add_argument("--error-rate", type=float, default=MOCK_ERP_ERROR_RATE)
+    parser.add_argument("--session-ttl", type=float, default=MOCK_ERP_SESSION_TTL)
+    args = parser.parse_args()
+    config = MockConfig(
+        students=args.students, latency_ms=args.latency_ms, error_rate=args.error_rate, session_ttl=args.session_ttl
+    )
+    print(f"🧪 Mock ERP with {config.students} students — log in as {mock_username(0)} / {config.password}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,70 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from backend.database.bulk_ingest import IngestBuffer, flush_buffer
+from backend.scraper.archive import ARCHIVE_DIR, PayloadArchive, exam_archive_key
+
+# Exams parsed per worker task
+CHUNK_SIZE = 200
+# Buffered exams that trigger a bulk load
+FLUSH_EVERY = int(os.getenv("BATCH_FLUSH_EVERY", "500"))
+
+def latest_payloads(archive, username=None):
+    """[(exam, result_hash, username)] for the most recent archived payload of every (account, exam)."""
+    latest = {}
+    schedules = {}
+    for scrape in archive.scrapes():
+        if username is not None and scrape["username"] != username:
+            continue
+        if scrape["schedule"] not in schedules:
+            schedules[scrape["schedule"]] = {exam_archive_key(exam): exam for exam in archive.get(scrape["schedule"])}
+        exams = schedules[scrape["schedule"]]
+        for key, digest in scrape["results"].items():
+            if key in exams:
+                latest[(scrape["username"], key)] = (exams[key], digest, scrape["username"])
+    return [latest[k] for k in sorted(latest, key=lambda k: (k[0] or "", k[1]))]
+
+def parse_chunk(root, items):
+    """Worker: decompress and map one chunk of archived payloads into buffer rows."""
+    archive = PayloadArchive(root)
+    buffer = IngestBuffer()
+    for exam, digest, username in items:
+        results = archive.get(digest)
+        if results:
+            buffer.add(exam, results, username)
+    return buffer
+
+def replay(root=ARCHIVE_DIR, username=None, workers=None):
+    """Rebuild the database from the archive alone: parse across processes, bulk-load in the parent."""
+    started = time.perf_counter()
+    archive = PayloadArchive(root)
+    items = latest_payloads(archive, username)
+    print(f"🗄️ Replaying {len(items)} archived exams from {root}")
+
+    buffer = IngestBuffer()
+    rows = 0
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(parse_chunk, root, chunk) for chunk in chunks]):
+            parsed = future.result()
+            buffer.students.extend(parsed.students)
+            buffer.semesters.extend(parsed.semesters)
+            buffer.subjects.extend(parsed.subjects)
+            buffer.scraped_exams.extend(parsed.scraped_exams)
+            # The archive is the source of truth here, so existing rows are overwritten
+            if len(buffer) >= FLUSH_EVERY:
+                rows += flush_buffer(buffer.take(), upsert=True)["rows"]
+    rows += flush_buffer(buffer, upsert=True)["rows"]
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Replayed {len(items)} exams ({rows} rows) in {elapsed:.2f}s")
+    return {"exams": len(items), "rows": rows, "seconds": round(elapsed, 3)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-parse and re-ingest archived ERP payloads without touching the network.")
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help="archive directory")
+    parser.add_argument("--username", help="only replay this account")
+    parser.add_argument("--workers", type=int, help="parser processes (default: one per core)")
+    args = parser.parse_args()
+    replay(args.archive, args.username, args.workers)
@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import httpx
+from cryptography.fernet import Fernet, InvalidToken
+from backend.scraper.getting_cookies import LOGIN_URL, BASE_URL, login_and_get_cookies
+from backend.scraper.getting_exam_schedule import SCHEDULE_URL
+from backend.lib.telemetry import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are serialised
+    fcntl = None
+
+# Fernet key used to encrypt the cache file; the cache is disabled when it is not set
+SESSION_CACHE_KEY = os.getenv("SESSION_CACHE_KEY")
+SESSION_CACHE_PATH = os.getenv("SESSION_CACHE_PATH", ".session_cache")
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", "1800"))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "500"))
+PROBE_TIMEOUT = 10.0
+
+class SessionCache:
+    """Encrypted on-disk cookie store keyed by username, with TTL expiry and LRU eviction."""
+
+    def __init__(self, path=SESSION_CACHE_PATH, key=SESSION_CACHE_KEY, ttl=SESSION_CACHE_TTL, max_entries=SESSION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.fernet = Fernet(key) if key else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Batch logins consult the cache from several threads at once, and workers and batch runs share the file
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.fernet is not None
+
+    def _load(self):
+        if not self.enabled or not os.path.exists(self.path):
+            return {}
+        with open(self.path, "rb") as f:
+            try:
+                return json.loads(self.fernet.decrypt(f.read()))
+            except (InvalidToken, ValueError):
+                print("⚠️ Session cache unreadable with the current key, starting fresh.")
+                return {}
+
+    @contextmanager
+    def _locked(self):
+        """Hold the cache for one read-modify-write, against other threads and other processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self, entries):
+        # A unique temp file in the same directory, then an atomic rename over the cache
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)),
+                                        prefix=f"{os.path.basename(self.path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.fernet.encrypt(json.dumps(entries).encode()))
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, username):
+        """Return cached cookies for username, or None when missing or older than the TTL."""
+        if not self.enabled:
+            return None
+        with self._locked():
+            entries = self._load()
+            entry = entries.get(username)
+            if entry is None:
+                return None
+            now = time.time()
+            if now - entry["stored_at"] > self.ttl:
+                del entries[username]
+                self._save(entries)
+                return None
+            entry["last_used"] = now
+            self._save(entries)
+            return entry["cookies"]
+
+    def put(self, username, cookies):
+        if not self.enabled:
+            return
+        with self._locked():
+            entries = self._load()
+            now = time.time()
+            entries = {u: e for u, e in entries.items() if now - e["stored_at"] <= self.ttl}
+            entries[username] = {"cookies": cookies, "stored_at": now, "last_used": now}
+            # Evict least recently used sessions beyond the size limit
+            if len(entries) > self.max_entries:
+                keep = sorted(entries, key=lambda u: entries[u]["last_used"], reverse=True)[:self.max_entries]
+                entries = {u: entries[u] for u in keep}
+            self._save(entries)
+
+    def evict(self, username):
+        if not self.enabled:
+            return
+        with self._locked():
+            entries = self._load()
+            if entries.pop(username, None) is not None:
+                self._save(entries)
+
+def probe_session(cookies):
+    """Cheap check that a session is still logged in: the schedule endpoint only returns JSON when it is."""
+    try:
+        response = httpx.get(SCHEDULE_URL, cookies=cookies, timeout=PROBE_TIMEOUT, follow_redirects=False)
+        return response.status_code == 200 and isinstance(response.json(), list)
+    except (httpx.HTTPError, ValueError):
+        return False
+
+def http_login(username: str, password: str):
+    """Submit the login.htm form directly, without a browser. Returns cookies or None if it did not work."""
+    try:
+        with httpx.Client(timeout=PROBE_TIMEOUT, follow_redirects=True) as client:
+            page = client.get(LOGIN_URL)
+            match = re.search(r'<form[^>]*action="([^"]+)"', page.text)
+            action = match.group(1) if match else "j_spring_security_check"
+            client.post(f"{BASE_URL}/{action.lstrip('/')}", data={"j_username": username, "j_password": password})
+            cookies = dict(client.cookies)
+    except httpx.HTTPError as e:
+        print(f"⚠️ HTTP login failed: {e}")
+        return None
+    return cookies if cookies and probe_session(cookies) else None
+
+_cache = SessionCache()
+
+def get_cached_or_http_session(username: str, password: str):
+    """Try the cheap tiers only: a still-valid cached session, then a pure HTTP form login."""
+    with span("login", method="cache") as attrs:
+        cookies = _cache.get(username)
+        valid = bool(cookies) and probe_session(cookies)
+        attrs["outcome"] = "hit" if valid else "miss"
+    if valid:
+        print("♻️ Reusing cached session cookies.")
+        return cookies
+    if cookies:
+        _cache.evict(username)
+
+    with span("login", method="http") as attrs:
+        cookies = http_login(username, password)
+        attrs["outcome"] = "ok" if cookies else "failed"
+    if cookies:
+        print("✅ Logged in over HTTP without a browser.")
+        _cache.put(username, cookies)
+    return cookies
+
+def remember_session(username: str, cookies):
+    _cache.put(username, cookies)
+
+def get_session_cookies(username: str, password: str, headless: bool = False):
+    """Return working session cookies, starting Playwright only when the cached and HTTP tiers fail.
+    Pass headless=True where there is no display, e.g. on a worker node."""
+    cookies = get_cached_or_http_session(username, password)
+    if cookies:
+        return cookies
+    with span("login", method="browser"):
+        cookies = login_and_get_cookies(username, password, headless=headless)
+    remember_session(username, cookies)
+    return cookies
@@ -0,0 +1,175 @@
+# Standalone scrape worker. Any number of these, on any number of machines, share the scrape_jobs
+# queue in Postgres; each runs --concurrency jobs at a time:
+#   python -m backend.scraper.worker --concurrency 4
+#   python -m backend.scraper.worker --enqueue credentials.csv --incremental
+# Every worker has its own per-host rate limit (SCRAPER_RATE_LIMIT_PER_HOST), so divide the ERP's budget
+# by the number of worker processes.
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+from backend.database.job_queue import (
+    claim_job, complete_job, decrypt_password, enqueue_job, fail_job, heartbeat_job, queue_counts, run_in_transaction,
+)
+from backend.scraper.fetcher import scrape_account
+from backend.scraper.http_client import FetchStats
+from backend.scraper.session_cache import get_session_cookies
+from backend.lib.telemetry import bind_job, configure_logging
+
+WORKER_CONCURRENCY = int(os.getenv("SCRAPE_WORKER_CONCURRENCY", "4"))
+# Idle wait between claim attempts when the queue is empty
+POLL_SECONDS = float(os.getenv("SCRAPE_WORKER_POLL_SECONDS", "2"))
+# A job whose worker has not heartbeated for this long is handed to another worker
+LEASE_SECONDS = int(os.getenv("SCRAPE_JOB_LEASE_SECONDS", "120"))
+
+logger = logging.getLogger(__name__)
+
+class ScrapeWorker:
+    """Claims jobs from scrape_jobs and scrapes them, heartbeating each lease while it runs.
+
+    Results are upserted, so a job that is picked up again after a lost lease is safe to redo. "abandoned"
+    counts jobs whose outcome this worker could not record; their leases lapse and they are retried."""
+
+    def __init__(self, worker_id=None, concurrency=WORKER_CONCURRENCY, lease_seconds=LEASE_SECONDS, poll_seconds=POLL_SECONDS):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.stats = FetchStats()
+        self.counts = {"succeeded": 0, "retried": 0, "failed": 0, "abandoned": 0}
+        self._stopping = None
+
+    def stop(self):
+        """Stop claiming new jobs; running ones are finished first."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run(self):
+        self._stopping = asyncio.Event()
+        print(f"👷 Worker {self.worker_id} started with {self.concurrency} slots")
+        await asyncio.gather(*(self._slot() for _ in range(self.concurrency)))
+        print(f"👋 Worker {self.worker_id} stopped: {self.counts} | requests {self.stats.summary()}")
+
+    async def _slot(self):
+        while not self._stopping.is_set():
+            try:
+                job = await asyncio.to_thread(run_in_transaction, claim_job, self.worker_id, self.lease_seconds)
+            except Exception:
+                logger.exception("Claiming a job failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(job)
+
+    async def _heartbeat(self, job_id, work, lease_lost):
+        """Extend the lease while work runs. If the lease is lost, another worker may already be running
+        the job, so work is cancelled rather than left to race it."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 4)
+            try:
+                held = await asyncio.to_thread(run_in_transaction, heartbeat_job, job_id, self.worker_id, self.lease_seconds)
+            except Exception:
+                logger.exception("Heartbeat for job %s failed", job_id)
+                continue
+            if not held:
+                logger.warning("Lost the lease on job %s; abandoning it", job_id)
+                lease_lost.set()
+                work.cancel()
+                return
+
+    async def _scrape(self, job):
+        password = decrypt_password(job["credentials"])
+        # Workers run on servers without a display, so a browser login has to be headless
+        cookies = await asyncio.to_thread(get_session_cookies, job["username"], password, True)
+        return await scrape_account(cookies, job["username"], job["incremental"], stats=self.stats,
+                                    retry_failed=job["retry_failed"])
+
+    async def _record(self, fn, job, *args):
+        """Store a job's outcome with complete_job or fail_job. Returns their result, or None when the
+        database call fails; the lease then lapses and the job is retried, so the slot carries on."""
+        try:
+            return await asyncio.to_thread(run_in_transaction, fn, job["id"], self.worker_id, *args)
+        except Exception:
+            logger.exception("Recording the outcome of job %s failed", job["id"])
+            return None
+
+    async def _process(self, job):
+        # Each slot is its own task, so this only tags this job's spans and log lines
+        bind_job(f"scrape-job-{job['id']}")
+        username = job["username"]
+        lease_lost = asyncio.Event()
+        work = asyncio.create_task(self._scrape(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], work, lease_lost))
+        started = time.perf_counter()
+        try:
+            result = await work
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise
+            self.counts["abandoned"] += 1
+            print(f"⚠️ Job {job['id']} ({username}) abandoned: its lease expired and it was handed to another worker")
+        except Exception as e:
+            status = await self._record(fail_job, job, f"{type(e).__name__}: {e}")
+            if status is None:
+                self.counts["abandoned"] += 1
+                print(f"⚠️ Job {job['id']} ({username}) failed ({e}) but this worker no longer holds it")
+                return
+            self.counts["retried" if status == "queued" else "failed"] += 1
+            print(f"❌ Job {job['id']} ({username}) attempt {job['attempts']}/{job['max_attempts']} failed: {e}"
+                  + (" — requeued" if status == "queued" else ""))
+        else:
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            if not await self._record(complete_job, job, result):
+                self.counts["abandoned"] += 1
+                print(f"⚠️ Job {job['id']} ({username}) finished but could not be marked succeeded; it will be retried")
+                return
+            self.counts["succeeded"] += 1
+            print(f"✅ Job {job['id']} ({username}): {result['exams']} exams in {result['seconds']}s")
+        finally:
+            heartbeat.cancel()
+
+def enqueue_credentials(credentials, incremental=False, retry_failed=False):
+    """Queue one job per account; accounts with a job already queued or running are coalesced."""
+    queued = coalesced = 0
+    for username, password in credentials:
+        _, was_coalesced = run_in_transaction(enqueue_job, username, password, incremental, retry_failed)
+        coalesced += was_coalesced
+        queued += not was_coalesced
+    print(f"📬 Queued {queued} scrapes ({coalesced} already queued or running)")
+
+async def serve(worker):
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+if __name__ == "__main__":
+    from backend.scraper.batch import load_credentials
+
+    parser = argparse.ArgumentParser(description="Scrape worker for the Postgres-backed job queue.")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="jobs run at once by this process")
+    parser.add_argument("--worker-id", help="defaults to hostname:pid")
+    parser.add_argument("--metrics-port", type=int, help="serve this worker's Prometheus metrics on this port")
+    parser.add_argument("--enqueue", metavar="CREDENTIALS", help="queue every account in a CSV/JSONL file and exit")
+    parser.add_argument("--incremental", action="store_true", help="with --enqueue: only fetch new or re-declared exams")
+    parser.add_argument("--retry-failed", action="store_true", help="with --enqueue: only refetch dead-lettered exams")
+    parser.add_argument("--status", action="store_true", help="print queue counts and exit")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.enqueue:
+        enqueue_credentials(load_credentials(args.enqueue), args.incremental, args.retry_failed)
+    elif args.status:
+        print(run_in_transaction(queue_counts))
+    else:
+        if args.metrics_port:
+            from prometheus_client import start_http_server
+            start_http_server(args.metrics_port)
+        asyncio.run(serve(ScrapeWorker(args.worker_id, args.concurrency)))
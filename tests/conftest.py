@@ -0,0 +1,104 @@
+import os
+import socket
+import threading
+import time
+import pytest
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def serve_in_thread(app, port):
+    """Run an ASGI app with uvicorn on a daemon thread; returns the server so it can be stopped."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+# DB-backed tests need a throwaway Postgres (with pg_trgm available); every table in it is truncated between tests:
+#   TEST_DATABASE_URL=postgresql://postgres@localhost/scrape_test python -m pytest
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # backend.database.db_config reads DATABASE_URL at import, so this has to happen before any test module loads
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+# Tests never reach the real ERP: scraper modules build their URLs from ERP_BASE_URL at import, so point it at the
+# port the mock_erp fixture serves on. Archiving and the on-disk session cache are off, so nothing is written to the repo.
+ERP_PORT = free_port()
+os.environ["ERP_BASE_URL"] = f"http://127.0.0.1:{ERP_PORT}"
+os.environ["SCRAPER_ARCHIVE_DIR"] = ""
+os.environ.pop("SESSION_CACHE_KEY", None)
+MOCK_ERP_STUDENTS = int(os.getenv("BENCH_ACCOUNTS", "20"))
+MOCK_ERP_LATENCY_MS = float(os.getenv("BENCH_ERP_LATENCY_MS", "5"))
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    if not TEST_DATABASE_URL:
+        pytest.skip("Set TEST_DATABASE_URL to a throwaway database to run database tests")
+    import psycopg2
+    from backend.database.migrations import apply_migrations
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        apply_migrations(conn)
+    finally:
+        conn.close()
+    return TEST_DATABASE_URL
+
+def truncate_all(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT string_agg(quote_ident(tablename), ', ') FROM pg_tables
+            WHERE schemaname = 'public' AND tablename <> 'schema_migrations'
+        """)
+        cursor.execute(f"TRUNCATE {cursor.fetchone()[0]} CASCADE")
+    conn.commit()
+
+@pytest.fixture
+def db(migrated_db):
+    """A psycopg2 connection to the emptied test database."""
+    import psycopg2
+    conn = psycopg2.connect(migrated_db)
+    truncate_all(conn)
+    yield conn
+    conn.close()
+    from backend.database.db_connection import close_pool
+    close_pool()
+
+@pytest.fixture(scope="session")
+def mock_erp():
+    """The mock ERP with MOCK_ERP_STUDENTS accounts, served where ERP_BASE_URL points. Returns its MockConfig."""
+    from backend.scraper.mock_erp import MockConfig, create_app
+    config = MockConfig(students=MOCK_ERP_STUDENTS, latency_ms=MOCK_ERP_LATENCY_MS)
+    server = serve_in_thread(create_app(config), ERP_PORT)
+    yield config
+    server.should_exit = True
+
+@pytest.fixture
+def seeded_db(migrated_db):
+    """Call with a size to seed the test database with plan_check's synthetic cohort of that many students.
+
+    Seeding 100k students is slow, so a database that already holds the cohort, or a smaller one, is kept and grown."""
+    import psycopg2
+    from backend.database.plan_check import seed
+
+    def seed_to(students):
+        conn = psycopg2.connect(migrated_db)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*), COUNT(*) FILTER (WHERE register_no ~ '^R[0-9]{7}$') FROM students")
+                total, seeded = cursor.fetchone()
+            if total == seeded == students:
+                return
+            if total != seeded or seeded > students:
+                truncate_all(conn)
+        finally:
+            conn.close()
+        seed(migrated_db, students)
+
+    yield seed_to
+    from backend.database.db_connection import close_pool
+    close_pool()
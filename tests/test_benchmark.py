@@ -0,0 +1,87 @@
+# Scrape, parse and API benchmarks against the mock ERP, run with pytest-benchmark. There is no committed history:
+# --benchmark-autosave saves each run under .benchmarks/ (per machine, git-ignored), and --benchmark-compare fails the
+# next run when a mean is more than 20% slower than the last saved one. Throughput and /students p50/p95 are saved
+# in each run's extra_info; `pytest-benchmark compare --columns=mean,median` lists the saved runs side by side.
+#   TEST_DATABASE_URL=postgres://... python -m pytest tests/test_benchmark.py --benchmark-autosave
+#   TEST_DATABASE_URL=postgres://... python -m pytest tests/test_benchmark.py --benchmark-compare --benchmark-compare-fail=mean:20%
+# BENCH_ACCOUNTS and BENCH_ERP_LATENCY_MS size the scrape; BENCH_SIZES (default "1000,10000,100000") the /students cohorts.
+import asyncio
+import itertools
+import os
+import time
+import pytest
+from backend.lib.records import parse_results
+from backend.scraper.mock_erp import MockConfig, exam_schedule, mock_username, student_results
+
+BENCH_SIZES = sorted(int(size) for size in os.getenv("BENCH_SIZES", "1000,10000,100000").split(","))
+API_PAGE_SIZE = 50
+API_REQUESTS = 200
+
+def percentile(values, p):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 2) if values else None
+
+def test_parse_results(benchmark):
+    config = MockConfig(semesters=8, subjects=8)
+    payloads = [(exam, student_results(i, exam["semesterId"], config)) for i in range(100) for exam in exam_schedule(config)]
+    rows = sum(len(results) + 2 for _, results in payloads)
+
+    def parse_all():
+        for exam, results in payloads:
+            parse_results(exam, results)
+
+    benchmark(parse_all)
+    benchmark.extra_info["rows_per_sec"] = round(rows / benchmark.stats.stats.mean, 1)
+
+def test_scrape_accounts(benchmark, mock_erp, db):
+    """Every mock account scraped through the batch runner: logins, ERP fetches and bulk ingest."""
+    from backend.scraper.batch import run_batch
+    from backend.scraper.http_client import FetchStats
+
+    credentials = [(mock_username(i), mock_erp.password) for i in range(mock_erp.students)]
+    fetch_stats = FetchStats()
+    ingest_stats = {"rows": 0, "seconds": 0.0}
+
+    def scrape():
+        return asyncio.run(run_batch(credentials, fetch_stats=fetch_stats, ingest_stats=ingest_stats))
+
+    reports = benchmark.pedantic(scrape, rounds=3, iterations=1)
+    assert all(r["status"] == "ok" for r in reports)
+    seconds = benchmark.stats.stats.total
+    benchmark.extra_info.update({
+        "accounts_per_min": round(len(credentials) * 3 / seconds * 60, 1),
+        "http_requests_per_sec": round(fetch_stats.requests / seconds, 1),
+        "db_rows_per_sec": round(ingest_stats["rows"] / ingest_stats["seconds"], 1) if ingest_stats["seconds"] else None,
+    })
+
+# Smallest cohort first, so each size only grows the one seeded before it
+@pytest.mark.parametrize("students,sort", itertools.product(BENCH_SIZES, ["register_no", "cgpa", "name"]))
+def test_students_page(benchmark, seeded_db, students, sort):
+    """Uncached /students pages, walking forward by cursor, at each seeded cohort size."""
+    from fastapi.testclient import TestClient
+    from backend.api.cache import response_cache
+    from backend.api.server import app
+
+    seeded_db(students)
+    cursor = {}
+    latencies = []
+
+    def next_page():
+        response_cache.invalidate("*")
+        params = {"limit": API_PAGE_SIZE, "sort": sort, **({"after": cursor["after"]} if cursor.get("after") else {})}
+        started = time.perf_counter()
+        response = client.get("/students", params=params)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        # Past the last page there is no cursor, so the walk starts over from the first
+        cursor["after"] = response.headers.get("X-Next-Cursor")
+        return response
+
+    with TestClient(app) as client:
+        response = benchmark.pedantic(next_page, rounds=API_REQUESTS, iterations=1)
+    assert response.json()
+    benchmark.extra_info.update({
+        "students": students,
+        "students_p50_ms": percentile(latencies, 0.50),
+        "students_p95_ms": percentile(latencies, 0.95),
+    })
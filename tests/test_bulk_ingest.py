@@ -0,0 +1,118 @@
+from backend.database.bulk_ingest import IngestBuffer, flush_buffer
+from backend.database.scrape_state import get_failed_exams, payload_hash, update_failed_exams
+from backend.scraper.mock_erp import MockConfig, exam_schedule, mock_register_no, student_results
+
+CONFIG = MockConfig(semesters=2, subjects=3)
+
+def filled_buffer(students=2, username="alice"):
+    buffer = IngestBuffer()
+    for i in range(students):
+        for exam in exam_schedule(CONFIG):
+            buffer.add(exam, student_results(i, exam["semesterId"], CONFIG), username)
+    return buffer
+
+def table_counts(db):
+    counts = {}
+    with db.cursor() as cursor:
+        for table in ("students", "semesters", "subjects", "scraped_exams", "student_subject_results"):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
+    return counts
+
+def test_buffer_record_only_keeps_scrape_state_only():
+    buffer = IngestBuffer()
+    exam = exam_schedule(CONFIG)[0]
+    buffer.add(exam, student_results(0, 1, CONFIG), "alice", record_only=True)
+    assert (buffer.students, buffer.semesters, buffer.subjects) == ([], [], [])
+    assert len(buffer) == 1 and buffer.usernames() == {"alice"}
+
+def test_take_moves_everything_into_a_new_buffer():
+    buffer = filled_buffer(students=1)
+    buffer.recovered_exams.append(("bob", 5001, 1))
+    taken = buffer.take()
+    assert len(buffer) == 0 and not buffer.subjects and not buffer.recovered_exams
+    assert len(taken) == 4 and len(taken.subjects) == 6
+    assert taken.usernames() == {"alice", "bob"}
+
+def test_flushing_the_same_rows_twice_changes_nothing(db):
+    buffer = filled_buffer()
+    flush_buffer(buffer)
+    first = table_counts(db)
+    with db.cursor() as cursor:
+        cursor.execute("SELECT register_no, cgpa FROM students ORDER BY register_no")
+        cgpas = cursor.fetchall()
+
+    flush_buffer(buffer)
+    flush_buffer(buffer, upsert=True)
+
+    assert first == {"students": 2, "semesters": 4, "subjects": 12, "scraped_exams": 4, "student_subject_results": 12}
+    assert table_counts(db) == first
+    with db.cursor() as cursor:
+        cursor.execute("SELECT register_no, cgpa FROM students ORDER BY register_no")
+        assert cursor.fetchall() == cgpas
+
+def corrected_marks_buffer(username):
+    """Student 0's first exam with one subject's internal marks corrected to 7, which the mock never produces."""
+    results = student_results(0, 1, CONFIG)
+    results[0] = {**results[0], "InternalMarks": "7"}
+    buffer = IngestBuffer()
+    buffer.add(exam_schedule(CONFIG)[0], results, username)
+    return buffer, results
+
+def stored_exam(db, subject_code):
+    with db.cursor() as cursor:
+        cursor.execute("""
+            SELECT sub.internal_marks, se.content_hash
+            FROM subjects sub
+            LEFT JOIN scraped_exams se USING (exam_schedule_timetable_id, semester_no, register_no)
+            WHERE sub.register_no = %s AND sub.subject_code = %s
+        """, (mock_register_no(0), subject_code))
+        return cursor.fetchone()
+
+def test_rows_without_scrape_state_are_only_overwritten_on_upsert(db):
+    flush_buffer(filled_buffer(students=1, username=None))
+    changed, results = corrected_marks_buffer(username=None)
+    original = float(student_results(0, 1, CONFIG)[0]["InternalMarks"])
+
+    flush_buffer(changed)
+    assert stored_exam(db, results[0]["subjectCode"])[0] == original
+    flush_buffer(changed, upsert=True)
+    assert stored_exam(db, results[0]["subjectCode"])[0] == 7
+
+def test_scrape_state_never_runs_ahead_of_the_stored_rows(db):
+    # A full (non-upsert) run records the new payload hash, so it has to store that payload's rows too;
+    # otherwise incremental runs would treat the corrected marks as already stored
+    flush_buffer(filled_buffer(students=1))
+    changed, results = corrected_marks_buffer(username="alice")
+
+    flush_buffer(changed)
+
+    assert stored_exam(db, results[0]["subjectCode"]) == (7, payload_hash(results))
+
+def test_last_buffered_row_wins_within_a_batch(db):
+    flush_buffer(filled_buffer(students=1), upsert=True)
+    _, results = corrected_marks_buffer(username=None)
+    exam = exam_schedule(CONFIG)[0]
+    # The original payload, then the correction, then the correction again, all in one batch
+    buffer = IngestBuffer()
+    buffer.add(exam, student_results(0, 1, CONFIG))
+    buffer.add(exam, results)
+    buffer.add(exam, student_results(0, 1, CONFIG))
+    buffer.add(exam, results)
+
+    flush_buffer(buffer, upsert=True)
+
+    assert stored_exam(db, results[0]["subjectCode"])[0] == 7
+
+def test_flush_clears_dead_letters_of_recovered_exams(db):
+    exam = exam_schedule(CONFIG)[0]
+    with db.cursor() as cursor:
+        update_failed_exams("alice", [(5001, 1, exam, "timeout"), (5002, 2, exam, "timeout")], [], cursor)
+    db.commit()
+
+    buffer = IngestBuffer()
+    buffer.recovered_exams.append(("alice", 5001, 1))
+    flush_buffer(buffer)
+
+    with db.cursor() as cursor:
+        assert set(get_failed_exams("alice", cursor)) == {(5002, 2)}
@@ -0,0 +1,72 @@
+import pytest
+from backend.api.cache import ResponseCache, etag_matches
+from backend.database.notifications import COHORT_CHANGED
+
+def computing(payload):
+    calls = []
+
+    async def compute():
+        calls.append(payload)
+        return payload, {}
+    return compute, calls
+
+async def fill(cache):
+    for endpoint, register_no in (("students", None), ("sgpa_progression", "R1"), ("sgpa_progression", "R2"),
+                                  ("top_subjects", "R1"), ("top_subjects", "R2")):
+        compute, _ = computing({"endpoint": endpoint})
+        await cache.get_or_compute(endpoint, compute, register_no=register_no)
+
+def cached(cache):
+    return sorted((endpoint, register_no) for endpoint, register_no, _ in cache._entries.keys())
+
+@pytest.mark.asyncio
+async def test_second_lookup_is_a_hit_with_the_same_etag():
+    cache = ResponseCache()
+    compute, calls = computing({"a": 1})
+    first = await cache.get_or_compute("students", compute, params={"limit": 50})
+    second = await cache.get_or_compute("students", compute, params={"limit": 50})
+    assert first == second and len(calls) == 1
+    assert first[0] == b'{"a": 1}'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_student_change_drops_that_student_and_list_entries():
+    cache = ResponseCache()
+    await fill(cache)
+    cache.invalidate("R1")
+    assert cached(cache) == [("sgpa_progression", "R2"), ("top_subjects", "R2")]
+
+@pytest.mark.asyncio
+async def test_cohort_change_drops_cohort_dependent_entries():
+    cache = ResponseCache()
+    await fill(cache)
+    cache.invalidate(COHORT_CHANGED)
+    assert cached(cache) == [("sgpa_progression", "R1"), ("sgpa_progression", "R2")]
+
+@pytest.mark.asyncio
+async def test_star_clears_everything():
+    cache = ResponseCache()
+    await fill(cache)
+    cache.invalidate("*")
+    assert cached(cache) == []
+
+@pytest.mark.asyncio
+async def test_result_computed_across_an_invalidation_is_not_kept():
+    cache = ResponseCache()
+
+    async def compute():
+        cache.invalidate("R9")
+        return {"a": 1}, {}
+
+    body, _, _ = await cache.get_or_compute("students", compute)
+    assert body == b'{"a": 1}'
+    assert cached(cache) == []
+
+def test_etag_matches_lists_and_weak_tags():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"old", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abcd", "ab"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,66 @@
+import pytest
+from backend.scraper import http_client
+from backend.scraper.http_client import CircuitBreaker
+
+HOST = "erp.example"
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(http_client.time, "monotonic", lambda: now[0])
+    return now
+
+def open_breaker(breaker):
+    for _ in range(breaker.threshold):
+        breaker.record_failure(HOST)
+
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    breaker.record_failure(HOST)
+    breaker.record_failure(HOST)
+    assert breaker.check(HOST) == 0
+    breaker.record_failure(HOST)
+    assert breaker.opens == 1
+    assert breaker.check(HOST) == 30
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    breaker.record_failure(HOST)
+    breaker.record_failure(HOST)
+    breaker.record_success(HOST)
+    breaker.record_failure(HOST)
+    assert breaker.check(HOST) == 0 and breaker.opens == 0
+
+def test_one_probe_after_cooldown_and_success_closes(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    open_breaker(breaker)
+    clock[0] += 31
+    assert breaker.check(HOST) == 0
+    assert breaker.is_probing(HOST)
+    # Everyone else keeps waiting while the probe is out
+    assert breaker.check(HOST) > 0
+    breaker.record_success(HOST)
+    assert breaker.check(HOST) == 0 and not breaker.is_probing(HOST)
+
+def test_failed_probe_reopens_for_a_full_cooldown(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    open_breaker(breaker)
+    clock[0] += 31
+    breaker.check(HOST)
+    breaker.record_failure(HOST)
+    assert breaker.opens == 2
+    assert breaker.check(HOST) == 30
+
+def test_ended_probe_lets_the_next_request_probe(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    open_breaker(breaker)
+    clock[0] += 31
+    breaker.check(HOST)
+    breaker.end_probe(HOST)
+    assert breaker.check(HOST) == 0 and breaker.is_probing(HOST)
+
+def test_hosts_are_independent(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.record_failure(HOST)
+    assert breaker.check(HOST) > 0
+    assert breaker.check("other.example") == 0
@@ -0,0 +1,92 @@
+import pytest
+from cryptography.fernet import Fernet
+from backend.database import job_queue
+from backend.database.job_queue import (
+    claim_job, complete_job, decrypt_password, enqueue_job, fail_job, get_job, heartbeat_job, run_in_transaction,
+)
+
+@pytest.fixture(autouse=True)
+def queue_key(monkeypatch):
+    monkeypatch.setattr(job_queue, "SCRAPE_QUEUE_KEY", Fernet.generate_key().decode())
+
+def enqueue_limited(db, username, max_attempts):
+    with db.cursor() as cursor:
+        job_id, _ = enqueue_job(username, "pw", False, False, cursor, max_attempts=max_attempts)
+    db.commit()
+    return job_id
+
+def expire_lease(db, job_id):
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE scrape_jobs SET lease_expires_at = NOW() - interval '1 second' WHERE id = %s", (job_id,))
+    db.commit()
+
+def make_runnable(db, job_id):
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE scrape_jobs SET run_after = NOW() WHERE id = %s", (job_id,))
+    db.commit()
+
+def test_claim_hands_out_each_job_once_in_order(db):
+    first, _ = run_in_transaction(enqueue_job, "alice", "pw", False, False)
+    second, _ = run_in_transaction(enqueue_job, "bob", "pw", False, False)
+
+    a = run_in_transaction(claim_job, "worker-a", 60)
+    b = run_in_transaction(claim_job, "worker-b", 60)
+
+    assert (a["id"], b["id"]) == (first, second)
+    assert a["attempts"] == 1
+    assert decrypt_password(a["credentials"]) == "pw"
+    assert run_in_transaction(claim_job, "worker-c", 60) is None
+
+def test_enqueue_coalesces_onto_the_active_job(db):
+    job_id, coalesced = run_in_transaction(enqueue_job, "alice", "pw", False, False)
+    assert not coalesced
+    assert run_in_transaction(enqueue_job, "alice", "pw", True, False) == (job_id, True)
+
+    run_in_transaction(claim_job, "worker-a", 60)
+    assert run_in_transaction(enqueue_job, "alice", "pw", False, False) == (job_id, True)
+
+    assert run_in_transaction(complete_job, job_id, "worker-a", {"exams": 3})
+    new_id, coalesced = run_in_transaction(enqueue_job, "alice", "pw", False, False)
+    assert new_id != job_id and not coalesced
+
+def test_expired_lease_goes_to_another_worker(db):
+    job_id, _ = run_in_transaction(enqueue_job, "alice", "pw", False, False)
+    run_in_transaction(claim_job, "worker-a", 60)
+    assert run_in_transaction(heartbeat_job, job_id, "worker-a", 60)
+
+    expire_lease(db, job_id)
+    job = run_in_transaction(claim_job, "worker-b", 60)
+
+    assert job["id"] == job_id and job["attempts"] == 2
+    # The old holder can no longer touch it
+    assert not run_in_transaction(heartbeat_job, job_id, "worker-a", 60)
+    assert not run_in_transaction(complete_job, job_id, "worker-a", {})
+    assert run_in_transaction(fail_job, job_id, "worker-a", "late") is None
+    assert run_in_transaction(complete_job, job_id, "worker-b", {"exams": 1})
+    assert run_in_transaction(get_job, job_id)["status"] == "succeeded"
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(db):
+    job_id = enqueue_limited(db, "alice", 1)
+    run_in_transaction(claim_job, "worker-a", 60)
+    expire_lease(db, job_id)
+
+    assert run_in_transaction(claim_job, "worker-b", 60) is None
+    job = run_in_transaction(get_job, job_id)
+    assert job["status"] == "failed"
+    assert job["last_error"] == "lease expired on worker-a"
+
+def test_failures_back_off_then_fail_for_good(db):
+    job_id = enqueue_limited(db, "alice", 2)
+    run_in_transaction(claim_job, "worker-a", 60)
+
+    assert run_in_transaction(fail_job, job_id, "worker-a", "boom") == "queued"
+    # Backed off, so not claimable yet
+    assert run_in_transaction(claim_job, "worker-a", 60) is None
+
+    make_runnable(db, job_id)
+    assert run_in_transaction(claim_job, "worker-a", 60)["attempts"] == 2
+    assert run_in_transaction(fail_job, job_id, "worker-a", "boom again") == "failed"
+
+    with db.cursor() as cursor:
+        cursor.execute("SELECT credentials, last_error FROM scrape_jobs WHERE id = %s", (job_id,))
+        assert cursor.fetchone() == (None, "boom again")
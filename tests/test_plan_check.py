@@ -0,0 +1,30 @@
+import asyncio
+import os
+import psycopg2
+import pytest
+from backend.database.plan_check import BASELINE_STUDENTS, api_queries, check, explain_all, load_baseline, seed
+
+# Seeding BASELINE_STUDENTS students takes a minute or two, so this uses its own database, kept between runs
+PLAN_CHECK_DATABASE_URL = os.getenv("PLAN_CHECK_DATABASE_URL")
+
+def seeded_students(dsn):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('students') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                return 0
+            cursor.execute("SELECT COUNT(*) FROM students")
+            return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+def test_baseline_covers_every_api_query():
+    assert set(load_baseline()) == set(api_queries("R0000001"))
+
+@pytest.mark.skipif(not PLAN_CHECK_DATABASE_URL, reason="Set PLAN_CHECK_DATABASE_URL to a throwaway database to check query plans")
+def test_api_query_plans_have_no_seq_scans_or_cost_regressions():
+    if seeded_students(PLAN_CHECK_DATABASE_URL) < BASELINE_STUDENTS:
+        seed(PLAN_CHECK_DATABASE_URL, BASELINE_STUDENTS)
+    results = asyncio.run(explain_all(PLAN_CHECK_DATABASE_URL))
+    assert check(results, load_baseline()) == []
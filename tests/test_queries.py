@@ -0,0 +1,20 @@
+from backend.api.queries import search_args
+
+def test_search_args_builds_a_prefix_tsquery_per_word():
+    normalized, tsquery, prefix, contains, limit = search_args("  Mock   Student 12 ", 10)
+    assert normalized == "mock student 12"
+    assert tsquery == "mock:* & student:* & 12:*"
+    assert (prefix, contains, limit) == ("mock student 12%", "%mock student 12%", 10)
+
+def test_search_args_keeps_tsquery_operators_out():
+    _, tsquery, _, _, _ = search_args("a&b | !c:* (d)", 5)
+    assert tsquery == "a:* & b:* & c:* & d:*"
+
+def test_search_args_escapes_like_wildcards():
+    _, _, prefix, contains, _ = search_args(r"50%_off\x", 5)
+    assert prefix == r"50\%\_off\\x%"
+    assert contains == r"%50\%\_off\\x%"
+
+def test_search_args_without_words_is_none():
+    assert search_args("  %&!  ", 5) is None
+    assert search_args("", 5) is None
@@ -0,0 +1,43 @@
+from backend.lib.records import (
+    SEMESTER_COLUMNS, STUDENT_COLUMNS, SUBJECT_COLUMNS, exam_key, parse_results, to_int, to_text,
+)
+from backend.scraper.mock_erp import MockConfig, exam_schedule, mock_register_no, student_results
+
+CONFIG = MockConfig(semesters=2, subjects=3)
+
+def test_converters():
+    assert to_text("  A+ ") == "A+"
+    assert to_text(" - ") is None and to_text(None) is None
+    assert to_text(7) == "7"
+    assert to_int("12") == 12 and to_int(4.0) == 4
+    assert to_int("2.5") is None and to_int(2.5) is None and to_int("-") is None
+
+def test_parse_results_rows_match_table_columns():
+    exam = exam_schedule(CONFIG)[1]
+    results = student_results(4, exam["semesterId"], CONFIG)
+    student, semester, subjects = parse_results(exam, results)
+
+    assert len(student) == len(STUDENT_COLUMNS)
+    assert len(semester) == len(SEMESTER_COLUMNS)
+    assert [len(row) for row in subjects] == [len(SUBJECT_COLUMNS)] * 3
+
+    student = dict(zip(STUDENT_COLUMNS, student))
+    assert student["register_no"] == mock_register_no(4)
+    assert student["name"] == "Mock Student 4"
+
+    semester = dict(zip(SEMESTER_COLUMNS, semester))
+    assert (semester["exam_schedule_timetable_id"], semester["semester_no"]) == exam_key(exam) == (5002, 2)
+    assert semester["sgpa"] == float(results[0]["sgpa"])
+    assert semester["block_reason"] is None
+
+def test_parse_results_subject_rows_are_keyed_and_converted():
+    exam = exam_schedule(CONFIG)[0]
+    results = student_results(4, exam["semesterId"], CONFIG)
+    _, _, subjects = parse_results(exam, results)
+
+    for row, payload in zip(subjects, results):
+        row = dict(zip(SUBJECT_COLUMNS, row))
+        assert (row["exam_schedule_timetable_id"], row["semester_no"], row["register_no"]) == (5001, 1, mock_register_no(4))
+        assert row["subject_code"] == payload["subjectCode"]
+        assert row["internal_marks"] == float(payload["InternalMarks"])
+        assert row["grade_point"] == float(payload["Pointer"])
@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+from cryptography.fernet import Fernet
+from backend.scraper.session_cache import SessionCache
+
+def put_many(path, key, prefix, n):
+    cache = SessionCache(path=path, key=key)
+    for i in range(n):
+        cache.put(f"{prefix}{i}", {"JSESSIONID": f"{prefix}{i}"})
+
+def test_round_trip_and_ttl(tmp_path):
+    path = str(tmp_path / "sessions")
+    cache = SessionCache(path=path, key=Fernet.generate_key(), ttl=60)
+    cache.put("alice", {"JSESSIONID": "a"})
+    assert cache.get("alice") == {"JSESSIONID": "a"}
+    assert oct(os.stat(path).st_mode & 0o777) == "0o600"
+
+    cache.ttl = -1
+    assert cache.get("alice") is None
+
+def test_disabled_cache_touches_no_files(tmp_path):
+    cache = SessionCache(path=str(tmp_path / "sessions"), key=None)
+    cache.put("alice", {"JSESSIONID": "a"})
+    assert cache.get("alice") is None
+    cache.evict("alice")
+    assert os.listdir(tmp_path) == []
+
+def test_concurrent_processes_keep_every_entry(tmp_path):
+    path = str(tmp_path / "sessions")
+    key = Fernet.generate_key()
+    context = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    processes = [context.Process(target=put_many, args=(path, key, f"p{n}-", 25)) for n in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    cache = SessionCache(path=path, key=key)
+    assert all(cache.get(f"p{n}-{i}") for n in range(4) for i in range(25))
+    # No temp files left behind
+    assert sorted(os.listdir(tmp_path)) == ["sessions", "sessions.lock"]